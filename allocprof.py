@@ -0,0 +1,239 @@
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from scenes import NO_KEYS, FrameObserver
+
+# Opt-in allocation profiling for the game loops (GAME_ALLOC=1, or
+# GAME_ALLOC=<file>.json for a JSON report). Per frame it records:
+#   transient KiB - tracemalloc high-water mark above the frame's start,
+#                   i.e. short-lived garbage made by update() and draw()
+#   retained KiB  - memory still held at present time that wasn't at the
+#                   start of the frame
+#   net blocks    - change in allocated memory blocks over the frame
+# plus every garbage collection and its pause. Every `sample_every` frames
+# it diffs tracemalloc snapshots around update() and draw() to attribute
+# allocations to source lines. Frames before `warmup` are ignored so
+# asset loading and first-frame caches don't count as steady state.
+#
+# python allocprof.py <game> runs a game headless with random input and
+# exits non-zero when the steady-state median per frame exceeds
+# --max-kib or --max-blocks, so it can gate a benchmark run.
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else 0
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(pct / 100 * len(values)))]
+
+
+class AllocationProfiler(FrameObserver):
+    def __init__(self, warmup=120, sample_every=30, top=10, output=None):
+        self.warmup = warmup
+        self.sample_every = sample_every
+        self.top = top
+        self.output = output
+
+        self.frame = 0
+        self.game = None
+        self.sampling = False
+        self.start_snapshot = None
+        self.gc_start = None
+        self.busy = False  # True while taking snapshots; GCs then are ours
+        # game -> list of per-frame values
+        self.transient = defaultdict(list)
+        self.retained = defaultdict(list)
+        self.blocks = defaultdict(list)
+        self.gc_pauses = defaultdict(list)  # game -> [(generation, seconds)]
+        # (game, file, line) -> [blocks, bytes] summed over sampled frames
+        self.lines = defaultdict(lambda: [0, 0])
+        self.samples = defaultdict(int)
+        # Snapshot filtering itself compiles fnmatch patterns
+        self.filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, fnmatch.__file__),
+            tracemalloc.Filter(False, os.path.join(os.path.dirname(re.__file__), "*")),
+        ]
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        gc.callbacks.append(self.on_gc)
+
+    @classmethod
+    def from_env(cls):
+        value = os.environ["GAME_ALLOC"]
+        return cls(output=value if value.endswith(".json") else None)
+
+    def on_gc(self, phase, info):
+        if self.busy:
+            return
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None and self.game is not None:
+            self.gc_pauses[self.game].append(
+                (info["generation"], time.perf_counter() - self.gc_start))
+            self.gc_start = None
+
+    def on_input(self, scene, events, keys):
+        self.frame += 1
+        self.game = scene.caption
+        self.sampling = (self.frame > self.warmup
+                         and self.frame % self.sample_every == 0)
+        if self.sampling:
+            self.busy = True
+            self.start_snapshot = tracemalloc.take_snapshot().filter_traces(
+                self.filters)
+            gc.collect(0)
+            self.busy = False
+        # Read after the snapshot so its own memory isn't counted
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self.start_blocks = sys.getallocatedblocks()
+
+    def before_present(self, screen):
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks() - self.start_blocks
+        if self.frame <= self.warmup:
+            return
+        game = self.game
+        self.transient[game].append((peak - self.start_memory) / 1024)
+        self.retained[game].append((current - self.start_memory) / 1024)
+        self.blocks[game].append(blocks)
+        if self.sampling:
+            self.busy = True
+            snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+            for stat in snapshot.compare_to(self.start_snapshot, "lineno"):
+                if stat.count_diff <= 0:
+                    continue
+                frame = stat.traceback[0]
+                line = self.lines[(game, frame.filename, frame.lineno)]
+                line[0] += stat.count_diff
+                line[1] += stat.size_diff
+            self.samples[game] += 1
+            self.start_snapshot = snapshot = None
+            gc.collect(0)
+            self.busy = False
+
+    def summary(self, game):
+        pauses = self.gc_pauses.get(game, [])
+        frames = len(self.transient[game])
+        samples = max(1, self.samples[game])
+        lines = sorted(
+            ((blocks / samples, size / samples, path, lineno)
+             for (g, path, lineno), (blocks, size) in self.lines.items()
+             if g == game),
+            reverse=True)[:self.top]
+        return {
+            "game": game,
+            "frames": frames,
+            "transient_kib_p50": median(self.transient[game]),
+            "transient_kib_p95": percentile(self.transient[game], 95),
+            "retained_kib_p50": median(self.retained[game]),
+            "net_blocks_p50": median(self.blocks[game]),
+            "net_blocks_p95": percentile(self.blocks[game], 95),
+            "gc_collections": len(pauses),
+            "gc_per_frame": len(pauses) / frames if frames else 0,
+            "gc_pause_ms_max": 1000 * max((p for _, p in pauses), default=0),
+            "gc_pause_ms_total": 1000 * sum(p for _, p in pauses),
+            "lines": [
+                {"file": os.path.relpath(path), "line": lineno,
+                 "blocks_per_frame": blocks, "kib_per_frame": size / 1024}
+                for blocks, size, path, lineno in lines
+            ],
+        }
+
+    def report(self):
+        return [self.summary(game) for game in sorted(self.transient)]
+
+    def check(self, max_kib=None, max_blocks=None):
+        # Returns a list of budget violations for steady-state medians
+        failures = []
+        for row in self.report():
+            if max_kib is not None and row["transient_kib_p50"] > max_kib:
+                failures.append(
+                    f"{row['game']}: {row['transient_kib_p50']:.1f} KiB "
+                    f"transient per frame > {max_kib}")
+            if max_blocks is not None and row["net_blocks_p50"] > max_blocks:
+                failures.append(
+                    f"{row['game']}: {row['net_blocks_p50']} net blocks "
+                    f"per frame > {max_blocks}")
+        return failures
+
+    def close(self):
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        rows = self.report()
+        if self.output:
+            with open(self.output, "w") as f:
+                json.dump(rows, f, indent=1)
+            print(f"Wrote allocation report to {self.output}")
+            return
+        for row in rows:
+            print(f"{row['game']}: {row['frames']} frames, transient "
+                  f"{row['transient_kib_p50']:.1f} KiB/frame "
+                  f"(p95 {row['transient_kib_p95']:.1f}), retained "
+                  f"{row['retained_kib_p50']:.1f} KiB/frame, net blocks "
+                  f"{row['net_blocks_p50']}/frame, {row['gc_collections']} "
+                  f"GCs (max pause {row['gc_pause_ms_max']:.2f} ms)")
+            for line in row["lines"]:
+                print(f"    {line['file']}:{line['line']}: "
+                      f"{line['blocks_per_frame']:.1f} blocks, "
+                      f"{line['kib_per_frame']:.2f} KiB per sampled frame")
+
+
+def benchmark(name, frames, profiler, seed=0):
+    # Imported here so envs can pull in the games without a cycle
+    import envs
+
+    random.seed(seed)
+    env = envs.make_env(name, "pixels")
+    env.reset()
+    for _ in range(frames):
+        profiler.on_input(env.game, (), NO_KEYS)
+        _, _, done, _ = env.step(random.randrange(env.num_actions))
+        profiler.before_present(env.surface)
+        if done:
+            env.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile per-frame allocations of a game running headless.")
+    parser.add_argument("game", help="snake, brickout, flappybird, shooter or tictactoe")
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--warmup", type=int, default=120)
+    parser.add_argument("--sample-every", type=int, default=30)
+    parser.add_argument("--max-kib", type=float, default=None,
+                        help="fail if median transient KiB per frame exceeds this")
+    parser.add_argument("--max-blocks", type=int, default=None,
+                        help="fail if median net blocks per frame exceeds this")
+    parser.add_argument("--json", default=None, help="write the report here")
+    args = parser.parse_args()
+
+    profiler = AllocationProfiler(
+        warmup=args.warmup, sample_every=args.sample_every, output=args.json)
+    benchmark(args.game, args.frames, profiler)
+    failures = profiler.check(args.max_kib, args.max_blocks)
+    profiler.close()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import json
+import mmap
+import os
+import sys
+
+import pygame
+
+import pixelformat
+
+# Prebuilt sprite atlas: every sprite the games use, already scaled to its
+# in-game size, packed into one raw RGBA sheet plus a JSON index.
+# Build it with `python atlas.py`; games fall back to the individual image
+# files for any sprite whose source changed since the atlas was built.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ATLAS_DATA = os.path.join(BASE_DIR, "images", "atlas.bin")
+ATLAS_INDEX = os.path.join(BASE_DIR, "images", "atlas.json")
+ATLAS_VERSION = 1
+ATLAS_MIN_WIDTH = 1024
+PADDING = 1
+
+_sheet = None
+_entries = None
+
+
+def sprite_key(path):
+    return os.path.relpath(os.path.abspath(path), BASE_DIR).replace(os.sep, "/")
+
+
+def collect_sprites():
+    # Imported here so the games can import this module at load time
+    import snake
+    import brickout
+    import shooter
+    import flappybird
+
+    specs = {}
+    for module in (snake, brickout, shooter, flappybird):
+        for spec in module.SPRITES:
+            path, size = spec[0], tuple(spec[1])
+            smooth = spec[2] if len(spec) > 2 else True
+            specs[(sprite_key(path), size)] = smooth
+    return specs
+
+
+def pack(sizes, sheet_width):
+    # Simple shelf packer, tallest sprites first
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > sheet_width:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def build_atlas():
+    specs = collect_sprites()
+    keys = sorted(specs)
+    images = []
+    for path, size in keys:
+        img = pygame.image.load(os.path.join(BASE_DIR, path))
+        images.append(pixelformat.scale_image(img, size, specs[(path, size)]))
+
+    sizes = [img.get_size() for img in images]
+    sheet_width = max([ATLAS_MIN_WIDTH] + [w for w, _ in sizes])
+    positions, sheet_height = pack(sizes, sheet_width)
+    sheet = pygame.Surface((sheet_width, sheet_height), pygame.SRCALPHA, 32)
+    sheet.fill((0, 0, 0, 0))
+
+    sprites = []
+    for (path, size), img, pos in zip(keys, images, positions):
+        sheet.blit(img, pos)
+        stat = os.stat(os.path.join(BASE_DIR, path))
+        sprites.append({
+            "path": path,
+            "size": list(size),
+            "rect": [pos[0], pos[1], size[0], size[1]],
+            "mtime_ns": stat.st_mtime_ns,
+            "file_size": stat.st_size,
+        })
+
+    with open(ATLAS_DATA, "wb") as f:
+        f.write(pygame.image.tobytes(sheet, "RGBA"))
+    index = {
+        "version": ATLAS_VERSION,
+        "width": sheet_width,
+        "height": sheet_height,
+        "format": "RGBA",
+        "sprites": sprites,
+    }
+    with open(ATLAS_INDEX, "w") as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+def is_fresh(entry):
+    try:
+        stat = os.stat(os.path.join(BASE_DIR, entry["path"]))
+    except OSError:
+        return False
+    return stat.st_mtime_ns == entry["mtime_ns"] and stat.st_size == entry["file_size"]
+
+
+def load_atlas():
+    global _sheet, _entries
+    _entries = {}
+    try:
+        with open(ATLAS_INDEX) as f:
+            index = json.load(f)
+        if index.get("version") != ATLAS_VERSION or index.get("format") != "RGBA":
+            return
+        size = (index["width"], index["height"])
+        with open(ATLAS_DATA, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if len(data) != size[0] * size[1] * 4:
+                    return
+                # One conversion into display format; sprites are subsurfaces
+                raw = pygame.image.frombuffer(data, size, "RGBA")
+                _sheet = raw.convert_alpha()
+                del raw
+    except (OSError, ValueError, KeyError, pygame.error):
+        _sheet = None
+        return
+
+    for entry in index["sprites"]:
+        if is_fresh(entry):
+            _entries[(entry["path"], tuple(entry["size"]))] = pygame.Rect(entry["rect"])
+
+
+def lookup(path, size):
+    # Returns a subsurface of the atlas, or None when the caller should load
+    # the image file itself (no atlas, stale entry or different size).
+    if _entries is None:
+        load_atlas()
+    if _sheet is None:
+        return None
+    rect = _entries.get((sprite_key(path), tuple(size)))
+    if rect is None:
+        return None
+    return _sheet.subsurface(rect)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    try:
+        index = build_atlas()
+    except (OSError, pygame.error) as e:
+        print(f"Error building atlas: {e}")
+        sys.exit(1)
+    print(f"Packed {len(index['sprites'])} sprites into "
+          f"{index['width']}x{index['height']} atlas at {ATLAS_DATA}")
@@ -0,0 +1,132 @@
+import random
+from collections import deque
+
+import snake
+from flappybird import BIRD_SIZE, GRAVITY
+from shooter import MAX_BULLETS, SPACESHIP_HEIGHT, VEL
+from tictactoe_ai import HUMAN
+
+# Simple autopilots that play the envs.py environments, for attract-mode
+# previews and demos. act(game) looks at the env's game scene and returns
+# an index into that env's ACTIONS.
+
+
+class SnakeAutopilot:
+    # Heads for the food along safe cells, preferring moves that leave the
+    # most room to keep moving
+    ACTION_FOR = {snake.UP: 1, snake.DOWN: 2, snake.LEFT: 3, snake.RIGHT: 4}
+
+    def act(self, game):
+        body = game.snake.positions
+        head_x, head_y = body[0]
+        current = game.snake.next_direction()
+        food_x, food_y = game.food.position
+        best, best_score = 0, None
+        for direction, action in self.ACTION_FOR.items():
+            if direction == (-current[0], -current[1]):
+                continue
+            cell = (head_x + direction[0], head_y + direction[1])
+            if not game.snake.can_move_to(cell):
+                continue
+            room = self.free_space(cell, body, len(body))
+            distance = abs(cell[0] - food_x) + abs(cell[1] - food_y)
+            score = (room >= len(body), -distance)
+            if best_score is None or score > best_score:
+                best = 0 if direction == current else action
+                best_score = score
+        return best
+
+    def free_space(self, start, body, limit):
+        # Cells reachable from start, counting up to limit
+        blocked = set(body[:-1])
+        seen = {start}
+        queue = deque([start])
+        while queue and len(seen) < limit:
+            x, y = queue.popleft()
+            for dx, dy in (snake.UP, snake.DOWN, snake.LEFT, snake.RIGHT):
+                cell = (x + dx, y + dy)
+                if (0 <= cell[0] < snake.GRID_COLS and 0 <= cell[1] < snake.GRID_ROWS
+                        and cell not in blocked and cell not in seen):
+                    seen.add(cell)
+                    queue.append(cell)
+        return len(seen)
+
+
+class BrickoutAutopilot:
+    # Keeps the paddle under the ball, slightly off-centre to vary angles
+    def __init__(self):
+        self.offset = 0
+
+    def act(self, game):
+        if game.ball_dy < 0 and random.random() < 0.02:
+            self.offset = random.randint(-40, 40)
+        target = game.ball_x + self.offset
+        center = game.paddle.centerx
+        if target < center - game.paddle_speed:
+            return 1
+        if target > center + game.paddle_speed:
+            return 2
+        return 0
+
+
+class FlappyBirdAutopilot:
+    # Flaps whenever the bird would drop below the next gap's lower half
+    MARGIN = 25
+
+    def act(self, game):
+        target = game.height // 2
+        for pipe in game.pipes:
+            if pipe['top'].right >= game.bird_x:
+                target = pipe['bottom'].top - BIRD_SIZE[1] - self.MARGIN
+                break
+        if game.bird_vel >= 0 and game.bird_y + game.bird_vel + GRAVITY > target:
+            return 1
+        return 0
+
+
+class ShooterAutopilot:
+    # Yellow ship: dodges red bullets heading for it, otherwise lines up
+    # with the red ship and fires
+    DODGE_DISTANCE = 220
+
+    def act(self, game):
+        yellow, red = game.yellow, game.red
+        for bullet in game.red_bullets:
+            if (0 < bullet.x - yellow.right < self.DODGE_DISTANCE
+                    and yellow.top - 5 < bullet.y < yellow.bottom + 5):
+                return 1 if bullet.y > yellow.centery else 2
+        if abs(yellow.centery - red.centery) > SPACESHIP_HEIGHT // 4:
+            if yellow.centery > red.centery + VEL:
+                return 1
+            if yellow.centery < red.centery - VEL:
+                return 2
+        if len(game.yellow_bullets) < MAX_BULLETS:
+            return 5
+        return 0
+
+
+class TicTacToeAutopilot:
+    # Picks among the human side's best-ordered candidate moves
+    def act(self, game):
+        lines = game.lines
+        moves = lines.candidates(lines.encode(game.board), HUMAN, limit=3)
+        if not moves:
+            return 0
+        return random.choice(moves)
+
+
+AUTOPILOTS = {
+    "snake": SnakeAutopilot,
+    "brickout": BrickoutAutopilot,
+    "flappybird": FlappyBirdAutopilot,
+    "shooter": ShooterAutopilot,
+    "tictactoe": TicTacToeAutopilot,
+    "gomoku": TicTacToeAutopilot,
+}
+
+
+def make_autopilot(name):
+    try:
+        return AUTOPILOTS[name]()
+    except KeyError:
+        raise ValueError(f"No autopilot for game: {name}") from None
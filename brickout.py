@@ -2,6 +2,16 @@ import pygame
 import random
 import math
 import os
+import struct
+
+import atlas
+import pixelformat
+import quality
+import sound
+from particles import ParticlePool
+from scenes import Scene, SceneManager
+from snapshot import PAUSE_KEY, REWIND_KEY, REWIND_SECONDS, RewindBuffer
+from viewport import ScaledDisplay
 
 # Constants
 WIDTH, HEIGHT = 700, 500
@@ -18,13 +28,34 @@ BRICK_HEIGHT = 30
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
+BRICK_COLOR = (255, 215, 0)
+BRICK_SPARK_COLOR = (255, 140, 0)
+WALL_COLOR = (150, 150, 255)
+
+# Particles live inside the box
+PARTICLE_BOUNDS = pygame.Rect(BOX_X, BOX_Y, BOX_WIDTH, BOX_HEIGHT)
+
+# Snapshot layout: ball x, y, dx, dy, paddle x, score, a bitmap of the
+# bricks still standing (bit row * BRICK_COLS + col) and game over
+SNAPSHOT = struct.Struct("<ddddhIQ?")
+ALL_BRICKS = (1 << BRICK_ROWS * BRICK_COLS) - 1
+
+# Sprites packed by atlas.py, as (path, in-game size)
+SPRITES = [
+    ("images/brickout/background.png", (WIDTH, HEIGHT)),
+    ("images/brickout/brick.png", (BRICK_WIDTH - 5, BRICK_HEIGHT - 5)),
+    ("images/brickout/ball.png", (BALL_RADIUS * 2 + 10, BALL_RADIUS * 2)),
+    ("images/brickout/paddle.png", (PADDLE_WIDTH, PADDLE_HEIGHT)),
+]
 
 
 def load_and_scale_image(path, size):
+    img = atlas.lookup(path, size)
+    if img is not None:
+        return pixelformat.optimize(img)
     try:
-        img = pygame.image.load(path).convert_alpha()
-        img = pygame.transform.smoothscale(img, size)
-        return img
+        img = pixelformat.scale_image(pygame.image.load(path), size)
+        return pixelformat.optimize(img)
     except Exception as e:
         print(f"Error loading image {path}: {e}")
         return None
@@ -41,7 +72,12 @@ def calculate_ball_direction(hit_x, paddle_x, paddle_width, speed):
     return dx, dy
 
 
-def create_bricks(brick_img):
+def brick_index(rect):
+    return ((rect.y - BOX_Y) // BRICK_HEIGHT * BRICK_COLS
+            + (rect.x - BOX_X) // BRICK_WIDTH)
+
+
+def create_bricks():
     bricks = []
     for row in range(BRICK_ROWS):
         for col in range(BRICK_COLS):
@@ -51,82 +87,159 @@ def create_bricks(brick_img):
                 BRICK_WIDTH - 5,
                 BRICK_HEIGHT - 5,
             )
-            bricks.append((rect, brick_img))
+            bricks.append(rect)
     return bricks
 
 
-def run_brickout(screen):
-    pygame.display.set_caption("Brickout")
-    clock = pygame.time.Clock()
-    font = pygame.font.Font(None, 36)
-    title_font = pygame.font.Font(None, 54)
-
-    # Load images
-    bg_img = load_and_scale_image(
-        'images/brickout/background.png', (WIDTH, HEIGHT))
-    brick_img = load_and_scale_image(
-        'images/brickout/brick.png', (BRICK_WIDTH-5, BRICK_HEIGHT-5))
-    ball_img = load_and_scale_image(
-        'images/brickout/ball.png', (BALL_RADIUS * 2 + 10, BALL_RADIUS * 2))
-    paddle_img = load_and_scale_image(
-        'images/brickout/paddle.png', (PADDLE_WIDTH, PADDLE_HEIGHT))
-
-    # Paddle (centered in box)
-    paddle = pygame.Rect(
-        BOX_X + (BOX_WIDTH - PADDLE_WIDTH) // 2,
-        BOX_Y + BOX_HEIGHT - PADDLE_HEIGHT - 10,
-        PADDLE_WIDTH, PADDLE_HEIGHT
-    )
-    paddle_speed = 10
-
-    # Ball (centered in box)
-    ball_x = BOX_X + BOX_WIDTH // 2
-    ball_y = BOX_Y + BOX_HEIGHT // 2 + 80
-    ball_dx = random.choice([-4, 4])
-    ball_dy = -4
-
-    # Bricks
-    bricks = create_bricks(brick_img)
-    score = 0
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                running = False
+class BrickoutGame(Scene):
+    caption = "Brickout"
+    fps = 60
+
+    def __init__(self):
+        super().__init__()
+        self.assets_loaded = False
+        self.bg_img = self.brick_img = self.ball_img = self.paddle_img = None
+        self.particles = ParticlePool()
+        self.history = RewindBuffer(SNAPSHOT.size, REWIND_SECONDS * self.fps)
+        self.reset()
+
+    def load_assets(self):
+        if self.assets_loaded:
+            return
+        self.font = pygame.font.Font(None, 36)
+        self.title_font = pygame.font.Font(None, 54)
+
+        # Load images
+        self.bg_img = load_and_scale_image(
+            'images/brickout/background.png', (WIDTH, HEIGHT))
+        self.brick_img = load_and_scale_image(
+            'images/brickout/brick.png', (BRICK_WIDTH-5, BRICK_HEIGHT-5))
+        self.ball_img = load_and_scale_image(
+            'images/brickout/ball.png', (BALL_RADIUS * 2 + 10, BALL_RADIUS * 2))
+        self.paddle_img = load_and_scale_image(
+            'images/brickout/paddle.png', (PADDLE_WIDTH, PADDLE_HEIGHT))
+
+        self.title_text = self.title_font.render("Brickout", True, (0, 200, 255))
+        self.paused_text = self.font.render("Paused - P to resume", True, WHITE)
+        self.rewind_text = self.font.render("<< Rewind", True, (150, 150, 255))
+        self.rewind_hint = self.font.render("Hold R to rewind", True, WHITE)
+        self.assets_loaded = True
+
+    def reset(self):
+        # Paddle (centered in box)
+        self.paddle = pygame.Rect(
+            BOX_X + (BOX_WIDTH - PADDLE_WIDTH) // 2,
+            BOX_Y + BOX_HEIGHT - PADDLE_HEIGHT - 10,
+            PADDLE_WIDTH, PADDLE_HEIGHT
+        )
+        self.paddle_speed = 10
+
+        # Ball (centered in box)
+        self.ball_x = BOX_X + BOX_WIDTH // 2
+        self.ball_y = BOX_Y + BOX_HEIGHT // 2 + 80
+        self.ball_dx = random.choice([-4, 4])
+        self.ball_dy = -4
+
+        # Bricks
+        self.bricks = create_bricks()
+        self.brick_bits = ALL_BRICKS
+        self.particles.clear()
+        self.score = 0
+        self.history.clear()
+        self.paused = False
+        self.rewinding = False
+        self.game_over = False
+        self.finished = False
+
+    def on_enter(self):
+        super().on_enter()
+        self.load_assets()
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            # Pause back to the menu; after game over this ends the game
+            self.finished = self.game_over
+            self.leave()
+        elif (event.type == pygame.KEYDOWN and event.key == PAUSE_KEY
+                and not self.game_over):
+            self.paused = not self.paused
+
+    def save_state(self, buffer, offset):
+        SNAPSHOT.pack_into(buffer, offset, self.ball_x, self.ball_y,
+                           self.ball_dx, self.ball_dy, self.paddle.x,
+                           self.score, self.brick_bits, self.game_over)
+
+    def load_state(self, buffer, offset):
+        (self.ball_x, self.ball_y, self.ball_dx, self.ball_dy, self.paddle.x,
+         self.score, bits, self.game_over) = SNAPSHOT.unpack_from(buffer, offset)
+        if bits != self.brick_bits:
+            self.brick_bits = bits
+            self.bricks = [rect for rect in create_bricks()
+                           if bits >> brick_index(rect) & 1]
+        # Particles are only decoration, so they aren't part of the state
+        self.particles.clear()
+
+    def update(self, keys):
+        # Holding R steps back one recorded frame per frame
+        self.rewinding = keys[REWIND_KEY]
+        if self.rewinding:
+            offset = self.history.pop()
+            if offset is not None:
+                self.load_state(self.history.data, offset)
+            return
+        if self.game_over or self.paused:
+            return
+        self.save_state(self.history.data, self.history.push())
+        self.particles.density = quality.current.particles
 
         # Paddle movement
-        keys = pygame.key.get_pressed()
+        paddle = self.paddle
         if keys[pygame.K_LEFT]:
-            paddle.x -= paddle_speed
+            paddle.x -= self.paddle_speed
             if paddle.x < BOX_X:
                 paddle.x = BOX_X
         if keys[pygame.K_RIGHT]:
-            paddle.x += paddle_speed
+            paddle.x += self.paddle_speed
             if paddle.x > BOX_X + BOX_WIDTH - PADDLE_WIDTH:
                 paddle.x = BOX_X + BOX_WIDTH - PADDLE_WIDTH
 
         # Ball movement
-        ball_x += ball_dx
-        ball_y += ball_dy
+        self.ball_x += self.ball_dx
+        self.ball_y += self.ball_dy
+        ball_x, ball_y = self.ball_x, self.ball_y
 
         # Ball-paddle collision (with angle)
         if paddle.collidepoint(ball_x, ball_y + BALL_RADIUS):
-            speed = math.hypot(ball_dx, ball_dy)
-            ball_dx, ball_dy = calculate_ball_direction(
+            if self.ball_dy > 0:
+                self.play_sound("paddle")
+                self.particles.emit(ball_x, paddle.top - 2, 16, WHITE,
+                                    speed=(1.0, 3.5),
+                                    angle=(-math.pi * 0.9, -math.pi * 0.1),
+                                    life=(10, 25))
+            speed = math.hypot(self.ball_dx, self.ball_dy)
+            self.ball_dx, self.ball_dy = calculate_ball_direction(
                 ball_x, paddle.x, PADDLE_WIDTH, speed)
 
         # Wall collision (box boundaries)
-        if ball_x - BALL_RADIUS <= BOX_X or ball_x + BALL_RADIUS >= BOX_X + BOX_WIDTH:
-            ball_dx = -ball_dx
+        if ball_x - BALL_RADIUS <= BOX_X:
+            self.ball_dx = -self.ball_dx
+            self.particles.emit(BOX_X + 1, ball_y, 10, WALL_COLOR,
+                                angle=(-math.pi / 3, math.pi / 3), life=(8, 18))
+        elif ball_x + BALL_RADIUS >= BOX_X + BOX_WIDTH:
+            self.ball_dx = -self.ball_dx
+            self.particles.emit(BOX_X + BOX_WIDTH - 3, ball_y, 10, WALL_COLOR,
+                                angle=(math.pi * 2 / 3, math.pi * 4 / 3),
+                                life=(8, 18))
         if ball_y - BALL_RADIUS <= BOX_Y:
-            ball_dy = -ball_dy
+            self.ball_dy = -self.ball_dy
+            self.particles.emit(ball_x, BOX_Y + 1, 10, WALL_COLOR,
+                                angle=(math.pi / 6, math.pi * 5 / 6),
+                                life=(8, 18))
 
         # Brick collision
         hit_index = None
-        for i, (brick_rect, _) in enumerate(bricks):
+        for i, brick_rect in enumerate(self.bricks):
             if (
                 brick_rect.collidepoint(ball_x, ball_y - BALL_RADIUS)
                 or brick_rect.collidepoint(ball_x, ball_y + BALL_RADIUS)
@@ -136,21 +249,34 @@ def run_brickout(screen):
                 hit_index = i
                 break
         if hit_index is not None:
-            bricks.pop(hit_index)
-            score += 10
-            ball_dy = -ball_dy
+            brick = self.bricks.pop(hit_index)
+            self.brick_bits &= ~(1 << brick_index(brick))
+            self.play_sound("brick")
+            self.particles.emit(brick.centerx, brick.centery, 60, BRICK_COLOR)
+            self.particles.emit(brick.centerx, brick.centery, 30,
+                                BRICK_SPARK_COLOR, speed=(2.0, 6.0),
+                                life=(10, 25))
+            self.score += 10
+            self.ball_dy = -self.ball_dy
 
         # Lose condition (ball falls below box)
         if ball_y - BALL_RADIUS > BOX_Y + BOX_HEIGHT:
-            running = False  # Ball fell below paddle
+            self.game_over = True  # Ball fell below paddle
 
         # Win condition
-        if not bricks:
-            running = False  # All bricks destroyed
+        if not self.bricks:
+            self.game_over = True  # All bricks destroyed
+        if self.game_over:
+            self.play_sound("lose" if self.bricks else "win")
 
-        # Drawing
-        if bg_img:
-            screen.blit(bg_img, (0, 0))
+        self.particles.update(PARTICLE_BOUNDS)
+
+    def latency_probe(self):
+        return self.paddle.x
+
+    def draw_frame(self, screen):
+        if self.bg_img:
+            screen.blit(self.bg_img, (0, 0))
         else:
             screen.fill(BLACK)
 
@@ -159,67 +285,69 @@ def run_brickout(screen):
                          (BOX_X-3, BOX_Y-3, BOX_WIDTH+6, BOX_HEIGHT+6), 3)
 
         # Draw title above the box
-        title_text = title_font.render("Brickout", True, (0, 200, 255))
-        screen.blit(title_text, (WIDTH // 2 -
-                    title_text.get_width() // 2, BOX_Y - 60))
+        screen.blit(self.title_text, (WIDTH // 2 -
+                    self.title_text.get_width() // 2, BOX_Y - 60))
+
+    def draw(self, screen):
+        self.draw_frame(screen)
+        if self.game_over:
+            self.draw_game_over(screen)
+            return
 
         # Draw bricks
-        for brick_rect, brick_img in bricks:
-            if brick_img:
-                screen.blit(brick_img, brick_rect)
+        for brick_rect in self.bricks:
+            if self.brick_img:
+                screen.blit(self.brick_img, brick_rect)
             else:
-                pygame.draw.rect(screen, (255, 215, 0), brick_rect)
+                pygame.draw.rect(screen, BRICK_COLOR, brick_rect)
+
+        self.particles.draw(screen)
 
         # Draw paddle
-        if paddle_img:
-            screen.blit(paddle_img, paddle)
+        if self.paddle_img:
+            screen.blit(self.paddle_img, self.paddle)
         else:
-            pygame.draw.rect(screen, WHITE, paddle)
+            pygame.draw.rect(screen, WHITE, self.paddle)
 
         # Draw ball
-        if ball_img:
-            screen.blit(ball_img, (int(ball_x - BALL_RADIUS),
-                        int(ball_y - BALL_RADIUS)))
+        if self.ball_img:
+            screen.blit(self.ball_img, (int(self.ball_x - BALL_RADIUS),
+                        int(self.ball_y - BALL_RADIUS)))
         else:
             pygame.draw.circle(screen, (220, 20, 60),
-                               (int(ball_x), int(ball_y)), BALL_RADIUS)
+                               (int(self.ball_x), int(self.ball_y)), BALL_RADIUS)
 
         # Draw score (top left inside box)
-        score_text = font.render(f"Score: {score}", True, (150, 150, 255))
+        score_text = self.font.render(f"Score: {self.score}", quality.current.antialias, (150, 150, 255))
         screen.blit(score_text, (BOX_X+BOX_WIDTH - 100, BOX_Y - 30))
-        pygame.display.flip()
-        clock.tick(60)
-
-    # Game Over / Win screen
-    screen.blit(bg_img, (0, 0)) if bg_img else screen.fill(BLACK)
-    pygame.draw.rect(screen, (150, 150, 255),
-                     (BOX_X-3, BOX_Y-3, BOX_WIDTH+6, BOX_HEIGHT+6), 3)
 
-    title_text = title_font.render("Brickout", True, (0, 200, 255))
+        if self.rewinding:
+            screen.blit(self.rewind_text, (BOX_X, BOX_Y - 30))
+        elif self.paused:
+            screen.blit(self.paused_text, (WIDTH // 2 -
+                        self.paused_text.get_width() // 2, HEIGHT // 2))
 
-    screen.blit(title_text, (WIDTH // 2 -
-                title_text.get_width() // 2, BOX_Y - 60))
-    msg = "You Win!" if not bricks else "Game Over!"
+    def draw_game_over(self, screen):
+        msg = "You Win!" if not self.bricks else "Game Over!"
 
-    over_text = font.render(f"{msg} Score: {score}", True, (255, 215, 0))
-    screen.blit(over_text, (WIDTH // 2 -
-                over_text.get_width() // 2, HEIGHT // 2 - 30))
+        over_text = self.font.render(
+            f"{msg} Score: {self.score}", quality.current.antialias, (255, 215, 0))
+        screen.blit(over_text, (WIDTH // 2 -
+                    over_text.get_width() // 2, HEIGHT // 2 - 30))
 
-    prompt = font.render("Press ESC to return to menu", True, WHITE)
-    screen.blit(prompt, (WIDTH // 2 - prompt.get_width() // 2, HEIGHT // 2 + 10))
+        prompt = self.font.render("Press ESC to return to menu", quality.current.antialias, WHITE)
+        screen.blit(prompt, (WIDTH // 2 - prompt.get_width() // 2, HEIGHT // 2 + 10))
+        if self.history.count:
+            screen.blit(self.rewind_hint, (WIDTH // 2 -
+                        self.rewind_hint.get_width() // 2, HEIGHT // 2 + 50))
 
-    pygame.display.flip()
 
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                waiting = False
-            elif event.type == pygame.QUIT:
-                waiting = False
+def run_brickout(screen):
+    SceneManager(screen).run(BrickoutGame())
 
 
 if __name__ == "__main__":
+    sound.pre_init()
     pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    screen = ScaledDisplay.from_env((WIDTH, HEIGHT))
     run_brickout(screen)
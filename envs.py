@@ -0,0 +1,446 @@
+import multiprocessing as mp
+import os
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+import brickout
+import flappybird
+import shooter
+import snake
+import tictactoe
+from scenes import NO_KEYS, HeldKeys
+
+# Reset/step environments over the game scenes, for bots and RL experiments.
+# Actions mirror the keys each game reads: every action is a pair of
+# (keys held this step, keys pressed this step).
+NOOP = ((), ())
+
+
+def key_event(key):
+    return pygame.event.Event(
+        pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+
+
+def ensure_display():
+    # Game assets are converted to the display format, which needs a video
+    # mode; off-screen environments get a 1x1 window on the dummy driver.
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        return
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((1, 1))
+
+
+class GameEnv:
+    ACTIONS = [NOOP]
+    STATE_SIZE = 0
+    FRAME_SIZE = (700, 500)
+
+    def __init__(self, obs_type="state"):
+        if obs_type not in ("state", "pixels"):
+            raise ValueError(f"Unknown observation type: {obs_type}")
+        self.obs_type = obs_type
+        self.game = self.make_game()
+        self.state = np.zeros(self.STATE_SIZE, dtype=np.float32)
+        if obs_type == "pixels":
+            ensure_display()
+            self.game.load_assets()
+            width, height = self.FRAME_SIZE
+            self.use_frame(np.zeros((height, width, 4), dtype=np.uint8))
+
+    def use_frame(self, frame):
+        # The surface draws straight into this (height, width, 4) array
+        # (BGRA matches the display format, so blits stay on the fast
+        # path), and pixel observations are RGB views refreshed in place
+        # every step
+        self.frame = frame
+        self.surface = pygame.image.frombuffer(frame, self.FRAME_SIZE, "BGRA")
+        self.pixels = frame[:, :, 2::-1]
+
+    @property
+    def num_actions(self):
+        return len(self.ACTIONS)
+
+    @property
+    def observation_shape(self):
+        if self.obs_type == "pixels":
+            return self.pixels.shape
+        return self.state.shape
+
+    @property
+    def observation_dtype(self):
+        return np.uint8 if self.obs_type == "pixels" else np.float32
+
+    def make_game(self):
+        raise NotImplementedError
+
+    def score(self):
+        return self.game.score
+
+    def fill_state(self, state):
+        raise NotImplementedError
+
+    def observe(self):
+        if self.obs_type == "pixels":
+            self.game.draw(self.surface)
+            return self.pixels
+        self.fill_state(self.state)
+        return self.state
+
+    def reset(self, seed=None):
+        if seed is not None:
+            random.seed(seed)
+        self.game.reset()
+        return self.observe()
+
+    def apply_action(self, action):
+        held, pressed = self.ACTIONS[action]
+        for key in pressed:
+            self.game.handle_event(key_event(key))
+        self.game.update(HeldKeys(held) if held else NO_KEYS)
+
+    def step(self, action):
+        before = self.score()
+        self.apply_action(action)
+        reward = self.score() - before
+        return self.observe(), reward, self.game.game_over, {}
+
+
+class SnakeEnv(GameEnv):
+    ACTIONS = [
+        NOOP,
+        ((), (pygame.K_UP,)),
+        ((), (pygame.K_DOWN,)),
+        ((), (pygame.K_LEFT,)),
+        ((), (pygame.K_RIGHT,)),
+    ]
+    # head x/y, direction x/y, food x/y, length, danger up/down/left/right
+    STATE_SIZE = 11
+
+    def make_game(self):
+        return snake.SnakeGame()
+
+    def apply_action(self, action):
+        # One environment step is one grid step of the snake
+        for key in self.ACTIONS[action][1]:
+            self.game.handle_event(key_event(key))
+        self.game.step()
+
+    def fill_state(self, state):
+        body = self.game.snake.positions
+        head_x, head_y = body[0]
+        state[0] = head_x / snake.GRID_COLS
+        state[1] = head_y / snake.GRID_ROWS
+        state[2], state[3] = self.game.snake.direction
+        state[4] = self.game.food.position[0] / snake.GRID_COLS
+        state[5] = self.game.food.position[1] / snake.GRID_ROWS
+        state[6] = len(body) / (snake.GRID_COLS * snake.GRID_ROWS)
+        for i, (dx, dy) in enumerate((snake.UP, snake.DOWN, snake.LEFT, snake.RIGHT)):
+            x, y = head_x + dx, head_y + dy
+            state[7 + i] = (
+                not (0 <= x < snake.GRID_COLS and 0 <= y < snake.GRID_ROWS)
+                or (x, y) in body
+            )
+
+
+class BrickoutEnv(GameEnv):
+    ACTIONS = [
+        NOOP,
+        ((pygame.K_LEFT,), ()),
+        ((pygame.K_RIGHT,), ()),
+    ]
+    # ball x/y/dx/dy, paddle x, one flag per brick
+    STATE_SIZE = 5 + brickout.BRICK_ROWS * brickout.BRICK_COLS
+
+    def make_game(self):
+        return brickout.BrickoutGame()
+
+    def fill_state(self, state):
+        game = self.game
+        state[0] = (game.ball_x - brickout.BOX_X) / brickout.BOX_WIDTH
+        state[1] = (game.ball_y - brickout.BOX_Y) / brickout.BOX_HEIGHT
+        state[2] = game.ball_dx / 10
+        state[3] = game.ball_dy / 10
+        state[4] = (game.paddle.x - brickout.BOX_X) / brickout.BOX_WIDTH
+        bricks = state[5:]
+        bricks[:] = 0
+        for rect in game.bricks:
+            row = (rect.y - brickout.BOX_Y) // brickout.BRICK_HEIGHT
+            col = (rect.x - brickout.BOX_X) // brickout.BRICK_WIDTH
+            bricks[row * brickout.BRICK_COLS + col] = 1
+
+
+class FlappyBirdEnv(GameEnv):
+    ACTIONS = [
+        NOOP,
+        ((), (pygame.K_SPACE,)),
+    ]
+    # bird y/velocity, next pipe distance, gap top, gap bottom
+    STATE_SIZE = 5
+
+    def make_game(self):
+        # Collisions use the sprites' masks, so state observations need the
+        # assets loaded too
+        ensure_display()
+        game = flappybird.FlappyBirdGame(self.FRAME_SIZE)
+        game.load_assets()
+        return game
+
+    def fill_state(self, state):
+        game = self.game
+        state[0] = game.bird_y / game.height
+        state[1] = game.bird_vel / 10
+        for pipe in game.pipes:
+            if pipe['top'].right >= game.bird_x:
+                state[2] = (pipe['top'].x - game.bird_x) / game.width
+                state[3] = pipe['top'].bottom / game.height
+                state[4] = pipe['bottom'].top / game.height
+                break
+        else:
+            state[2] = 1
+            state[3] = 0
+            state[4] = 1
+
+
+class ShooterEnv(GameEnv):
+    # Controls the yellow ship; the red ship stays idle unless a bot
+    # (e.g. shooter_bot.ShooterBot) flies it
+    ACTIONS = [
+        NOOP,
+        ((pygame.K_w,), ()),
+        ((pygame.K_s,), ()),
+        ((pygame.K_a,), ()),
+        ((pygame.K_d,), ()),
+        ((), (pygame.K_LCTRL,)),
+    ]
+    # ship x/y for both, health for both, x/y of every bullet slot
+    STATE_SIZE = 6 + 4 * shooter.MAX_BULLETS
+
+    def __init__(self, obs_type="state", bot=None):
+        self.bot = bot
+        super().__init__(obs_type)
+
+    def make_game(self):
+        return shooter.ShooterGame(self.bot)
+
+    def score(self):
+        return self.game.yellow_health - self.game.red_health
+
+    def fill_state(self, state):
+        game = self.game
+        state[0] = game.yellow.x / shooter.WIDTH
+        state[1] = game.yellow.y / shooter.HEIGHT
+        state[2] = game.red.x / shooter.WIDTH
+        state[3] = game.red.y / shooter.HEIGHT
+        state[4] = game.yellow_health / 10
+        state[5] = game.red_health / 10
+        i = 6
+        for bullets in (game.yellow_bullets, game.red_bullets):
+            for slot in range(shooter.MAX_BULLETS):
+                if slot < len(bullets):
+                    state[i] = bullets[slot].x / shooter.WIDTH
+                    state[i + 1] = bullets[slot].y / shooter.HEIGHT
+                else:
+                    state[i] = state[i + 1] = -1
+                i += 2
+
+
+class TicTacToeEnv(GameEnv):
+    # One action per square; the AI answers within the same step
+    ACTIONS = [NOOP] * (tictactoe.BOARD_ROWS * tictactoe.BOARD_COLS)
+    STATE_SIZE = tictactoe.BOARD_ROWS * tictactoe.BOARD_COLS
+    AI_THINK_TIME = 0.05  # seconds; the AI answers synchronously
+
+    def __init__(self, obs_type="state", think_time=None):
+        self.think_time = self.AI_THINK_TIME if think_time is None else think_time
+        super().__init__(obs_type)
+
+    def make_game(self):
+        return tictactoe.TicTacToeGame()
+
+    def score(self):
+        if self.game.check_win(1):
+            return 1
+        if self.game.check_win(2):
+            return -1
+        return 0
+
+    def apply_action(self, action):
+        game = self.game
+        if game.play(*divmod(action, game.cols)) and game.waiting_for_ai:
+            game.ai_move(self.think_time)
+
+    def fill_state(self, state):
+        state[:] = self.game.board.ravel()
+
+
+class GomokuEnv(TicTacToeEnv):
+    ACTIONS = [NOOP] * (tictactoe.GOMOKU_SIZE * tictactoe.GOMOKU_SIZE)
+    STATE_SIZE = tictactoe.GOMOKU_SIZE * tictactoe.GOMOKU_SIZE
+
+    def make_game(self):
+        return tictactoe.GomokuGame()
+
+
+ENVS = {
+    "snake": SnakeEnv,
+    "brickout": BrickoutEnv,
+    "flappybird": FlappyBirdEnv,
+    "shooter": ShooterEnv,
+    "tictactoe": TicTacToeEnv,
+    "gomoku": GomokuEnv,
+}
+
+
+def make_env(name, obs_type="state", **options):
+    # options go to the environment class, e.g. think_time for tictactoe
+    try:
+        env_class = ENVS[name]
+    except KeyError:
+        raise ValueError(f"Unknown game: {name}") from None
+    return env_class(obs_type, **options)
+
+
+def _worker(conn, name, obs_type, start, stop, shm_names, num_envs):
+    envs = [make_env(name, obs_type) for _ in range(start, stop)]
+    shms = [shared_memory.SharedMemory(name=n) for n in shm_names]
+    if obs_type == "pixels":
+        # Each env draws its frames directly into its slot of shared
+        # memory, so observations never need copying
+        width, height = envs[0].FRAME_SIZE
+        frames = np.ndarray((num_envs, height, width, 4), dtype=np.uint8,
+                            buffer=shms[0].buf)
+        for i, env in enumerate(envs):
+            env.use_frame(frames[start + i])
+        del frames
+        obs = None
+    else:
+        obs = np.ndarray((num_envs,) + envs[0].observation_shape,
+                         dtype=np.float32, buffer=shms[0].buf)
+    rewards = np.ndarray((num_envs,), dtype=np.float32, buffer=shms[1].buf)
+    dones = np.ndarray((num_envs,), dtype=np.bool_, buffer=shms[2].buf)
+    try:
+        while True:
+            cmd, data = conn.recv()
+            if cmd == "step":
+                for i, env in enumerate(envs):
+                    ob, reward, done, _ = env.step(data[i])
+                    if done:
+                        ob = env.reset()
+                    if obs is not None:
+                        obs[start + i] = ob
+                    rewards[start + i] = reward
+                    dones[start + i] = done
+                conn.send(None)
+            elif cmd == "reset":
+                for i, env in enumerate(envs):
+                    ob = env.reset(None if data is None else data[i])
+                    if obs is not None:
+                        obs[start + i] = ob
+                conn.send(None)
+            elif cmd == "close":
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        # The envs' surfaces export the shared buffer, which has to be
+        # released before it can be closed
+        del envs, obs, rewards, dones
+        for shm in shms:
+            shm.close()
+        conn.close()
+
+
+class VectorEnv:
+    # Steps num_envs copies of a game in worker processes. Observations,
+    # rewards and done flags live in shared memory; the arrays returned by
+    # reset()/step() are views that the next call overwrites in place.
+    # Pixel observations are RGB views of the BGRA frames the workers' games
+    # draw into. Finished environments are reset automatically.
+    def __init__(self, name, num_envs, obs_type="state", num_workers=None):
+        probe = make_env(name, "state")
+        if obs_type == "pixels":
+            width, height = probe.FRAME_SIZE
+            obs_shape, obs_dtype = (height, width, 4), np.uint8
+        else:
+            obs_shape, obs_dtype = probe.observation_shape, np.float32
+        self.num_envs = num_envs
+        self.num_actions = probe.num_actions
+
+        sizes = [
+            num_envs * int(np.prod(obs_shape)) * np.dtype(obs_dtype).itemsize,
+            num_envs * 4,
+            num_envs,
+        ]
+        self.shms = [shared_memory.SharedMemory(create=True, size=s) for s in sizes]
+        self.obs = np.ndarray((num_envs,) + obs_shape,
+                              dtype=obs_dtype, buffer=self.shms[0].buf)
+        if obs_type == "pixels":
+            self.obs = self.obs[..., 2::-1]
+        self.rewards = np.ndarray((num_envs,), dtype=np.float32,
+                                  buffer=self.shms[1].buf)
+        self.dones = np.ndarray((num_envs,), dtype=np.bool_,
+                                buffer=self.shms[2].buf)
+
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, num_envs))
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self.slices = list(zip(bounds[:-1], bounds[1:]))
+
+        ctx = mp.get_context("spawn")
+        self.conns = []
+        self.procs = []
+        shm_names = [shm.name for shm in self.shms]
+        for start, stop in self.slices:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(child, name, obs_type, int(start), int(stop),
+                      shm_names, num_envs),
+                daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        self.closed = False
+
+    def _broadcast(self, cmd, data):
+        for conn, (start, stop) in zip(self.conns, self.slices):
+            conn.send((cmd, None if data is None else list(data[start:stop])))
+        for conn in self.conns:
+            conn.recv()
+
+    def reset(self, seeds=None):
+        self._broadcast("reset", seeds)
+        return self.obs
+
+    def step(self, actions):
+        self._broadcast("step", actions)
+        return self.obs, self.rewards, self.dones
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+        del self.obs, self.rewards, self.dones
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,152 +1,289 @@
 import pygame
 import random
 import os
+import struct
 import sys
 
+import atlas
+import pixelformat
+import quality
+from scenes import Scene, SceneManager
+from snapshot import PAUSE_KEY, REWIND_KEY, REWIND_SECONDS, RewindBuffer, xorshift32
+
 GRAVITY = 0.5
 FLAP_STRENGTH = -8
 PIPE_GAP = 170
 PIPE_SPEED = 3
 PIPE_FREQ = 1500  # ms
+FPS = 60
 
 # Target sizes for gameplay
 BIRD_SIZE = (40, 28)      # width, height
-PIPE_WIDTH = 70           # width (height will be scaled as needed)
+PIPE_WIDTH = 70           # width
+PIPE_HEIGHT = 200         # height
 BASE_HEIGHT = 100         # height (width will be scaled to window)
 
+# Snapshot layout: bird y, bird velocity, pipe timer, base x, score, RNG
+# state, game over and pipe count, then x, gap top and scored per pipe
+MAX_PIPES = 8  # more than are ever on screen at once
+SNAPSHOT = struct.Struct("<dddiII?B")
+PIPE_SNAPSHOT = struct.Struct("<hh?")
+SNAPSHOT_SIZE = SNAPSHOT.size + MAX_PIPES * PIPE_SNAPSHOT.size
+
+# Sprites packed by atlas.py, as (path, in-game size) for the 700x500 window
+SPRITES = [
+    ("images/flappybird/background.png", (700, 500)),
+    ("images/flappybird/bird.gif", BIRD_SIZE),
+    ("images/flappybird/pipe.png", (PIPE_WIDTH, PIPE_HEIGHT)),
+    ("images/flappybird/base.png", (700, BASE_HEIGHT)),
+]
+
 def load_and_scale_image(name, size=None, width=None, height=None):
     path = os.path.join(os.path.dirname(__file__), name)
+    if size or (width and height):
+        img = atlas.lookup(path, size or (width, height))
+        if img is not None:
+            return pixelformat.optimize(img)
     try:
-        img = pygame.image.load(path).convert_alpha()
+        img = pygame.image.load(path)
         if size:
-            img = pygame.transform.smoothscale(img, size)
+            img = pixelformat.scale_image(img, size)
         elif width and height:
-            img = pygame.transform.smoothscale(img, (width, height))
+            img = pixelformat.scale_image(img, (width, height))
         elif width:
             scale = width / img.get_width()
-            img = pygame.transform.smoothscale(img, (width, int(img.get_height() * scale)))
+            img = pixelformat.scale_image(img, (width, int(img.get_height() * scale)))
         elif height:
             scale = height / img.get_height()
-            img = pygame.transform.smoothscale(img, (int(img.get_width() * scale), height))
-        return img
+            img = pixelformat.scale_image(img, (int(img.get_width() * scale), height))
+        return pixelformat.optimize(img)
     except Exception as e:
         print(f"Error loading {name}: {e}")
         sys.exit(1)
 
-def check_collision(bird_rect, pipes, base_y):
+def check_collision(bird_rect, pipes, base_y, masks=None):
+    # masks is (bird, top pipe, bottom pipe) for pixel-accurate hits;
+    # without it the sprites' bounding rects are used
     if bird_rect.top < 0 or bird_rect.bottom > base_y:
         return True
     for pipe in pipes:
-        if bird_rect.colliderect(pipe['top']) or bird_rect.colliderect(pipe['bottom']):
+        top, bottom = pipe['top'], pipe['bottom']
+        # Broad phase: pipes spawn in order and move together, so they stay
+        # sorted by x and only those overlapping the bird's column matter
+        if top.x >= bird_rect.right:
+            break
+        if top.right <= bird_rect.x:
+            continue
+        if masks is None:
+            if bird_rect.colliderect(top) or bird_rect.colliderect(bottom):
+                return True
+            continue
+        bird_mask, top_mask, bottom_mask = masks
+        if bird_rect.colliderect(top) and top_mask.overlap(
+                bird_mask, (bird_rect.x - top.x, bird_rect.y - top.y)):
+            return True
+        if bird_rect.colliderect(bottom) and bottom_mask.overlap(
+                bird_mask, (bird_rect.x - bottom.x, bird_rect.y - bottom.y)):
             return True
     return False
 
-def draw_pipes(screen, pipe_img, pipes):
-    for pipe in pipes:
+def make_pipe(x, gap_top, scored=False):
+    return {
+        'top': pygame.Rect(x, gap_top - PIPE_HEIGHT, PIPE_WIDTH, PIPE_HEIGHT),
+        'bottom': pygame.Rect(x, gap_top + PIPE_GAP, PIPE_WIDTH, PIPE_HEIGHT),
+        'scored': scored,
+    }
+
+def draw_pipes(screen, pipe_img, pipes, top_pipe_img=None):
+    if top_pipe_img is None:
         top_pipe_img = pygame.transform.flip(pipe_img, False, True)
+    for pipe in pipes:
         screen.blit(top_pipe_img, (pipe['top'].x, pipe['top'].y))
         screen.blit(pipe_img, (pipe['bottom'].x, pipe['bottom'].y))
 
-def run_flappybird(screen):
-    width, height = screen.get_size()
-    BIRD_X = width // 4
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 48)
-
-    # Load and scale images (use PNG for best results)
-    background_img = load_and_scale_image(
-        "images/flappybird/background.png", size=(width, height))
-    bird_img = load_and_scale_image(
-        "images/flappybird/bird.gif", size=BIRD_SIZE)
-    pipe_img = load_and_scale_image(
-        "images/flappybird/pipe.png", width=PIPE_WIDTH, height=200)
-    base_img = load_and_scale_image(
-        "images/flappybird/base.png", width=width, height=BASE_HEIGHT)
-    base_height = base_img.get_height()
-    base_y = height - base_height
-
-    # Game state
-    bird_y = height // 2
-    bird_vel = -10
-    pipes = []
-    score = 0
-    last_pipe = pygame.time.get_ticks()
-    base_x = 0
-
-    # pygame.time.wait(1000)
-
-    running = True
-
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                return
-            if (event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE) or \
-               (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1):
-                bird_vel = FLAP_STRENGTH
+class FlappyBirdGame(Scene):
+    caption = "Flappy Bird"
+    fps = FPS
+
+    def __init__(self, size=(700, 500)):
+        super().__init__()
+        self.width, self.height = size
+        self.bird_x = self.width // 4
+        self.base_y = self.height - BASE_HEIGHT
+        self.masks = None
+        self.assets_loaded = False
+        self.history = RewindBuffer(SNAPSHOT_SIZE, REWIND_SECONDS * FPS)
+        self.reset()
+
+    def load_assets(self):
+        if self.assets_loaded:
+            return
+        width, height = self.width, self.height
+        self.font = pygame.font.SysFont(None, 48)
+        self.paused_text = self.font.render("Paused - P to resume", True, (0, 0, 0))
+        self.rewind_text = self.font.render("<< Rewind", True, (0, 0, 0))
+        self.rewind_hint = self.font.render("Hold R to rewind", True, (255, 0, 0))
+
+        # Load and scale images (use PNG for best results)
+        self.background_img = load_and_scale_image(
+            "images/flappybird/background.png", size=(width, height))
+        self.bird_img = load_and_scale_image(
+            "images/flappybird/bird.gif", size=BIRD_SIZE)
+        self.pipe_img = load_and_scale_image(
+            "images/flappybird/pipe.png", width=PIPE_WIDTH, height=PIPE_HEIGHT)
+        self.base_img = load_and_scale_image(
+            "images/flappybird/base.png", width=width, height=BASE_HEIGHT)
+        self.top_pipe_img = pygame.transform.flip(self.pipe_img, False, True)
+
+        # Collision masks, built once from the sprites' transparency
+        self.masks = (
+            pygame.mask.from_surface(self.bird_img),
+            pygame.mask.from_surface(self.top_pipe_img),
+            pygame.mask.from_surface(self.pipe_img),
+        )
+        self.assets_loaded = True
+
+    def reset(self):
+        # Game state
+        self.bird_y = self.height // 2
+        self.bird_vel = -10
+        self.pipes = []
+        self.score = 0
+        self.pipe_timer = 0  # ms of play since the last pipe spawned
+        self.base_x = 0
+        self.flaps = 0
+        # Pipe heights come from our own generator so snapshots can hold it
+        self.rng = random.getrandbits(32) or 1
+        self.history.clear()
+        self.paused = False
+        self.rewinding = False
+        self.game_over = False
+        self.finished = False
+
+    def on_enter(self):
+        super().on_enter()
+        self.load_assets()
+
+    def flap(self):
+        self.bird_vel = FLAP_STRENGTH
+        self.flaps += 1
+        self.play_sound("flap")
+
+    def latency_probe(self):
+        return self.flaps
+
+    def save_state(self, buffer, offset):
+        pipes = self.pipes
+        count = min(len(pipes), MAX_PIPES)
+        SNAPSHOT.pack_into(buffer, offset, self.bird_y, self.bird_vel,
+                           self.pipe_timer, self.base_x, self.score, self.rng,
+                           self.game_over, count)
+        offset += SNAPSHOT.size
+        for i in range(count):
+            top = pipes[i]['top']
+            PIPE_SNAPSHOT.pack_into(buffer, offset, top.x, top.bottom,
+                                    pipes[i]['scored'])
+            offset += PIPE_SNAPSHOT.size
+
+    def load_state(self, buffer, offset):
+        (self.bird_y, self.bird_vel, self.pipe_timer, self.base_x, self.score,
+         self.rng, self.game_over, count) = SNAPSHOT.unpack_from(buffer, offset)
+        offset += SNAPSHOT.size
+        self.pipes = []
+        for _ in range(count):
+            self.pipes.append(make_pipe(*PIPE_SNAPSHOT.unpack_from(buffer, offset)))
+            offset += PIPE_SNAPSHOT.size
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            # Pause back to the menu; after game over this ends the game
+            self.finished = self.game_over
+            self.leave()
+            return
+        if self.game_over:
+            return
+        if event.type == pygame.KEYDOWN and event.key == PAUSE_KEY:
+            self.paused = not self.paused
+            return
+        if self.paused:
+            return
+        if (event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE) or \
+           (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1):
+            self.flap()
+
+    def update(self, keys):
+        # Holding R steps back one recorded frame per frame
+        self.rewinding = keys[REWIND_KEY]
+        if self.rewinding:
+            offset = self.history.pop()
+            if offset is not None:
+                self.load_state(self.history.data, offset)
+            return
+        if self.game_over or self.paused:
+            return
+        self.save_state(self.history.data, self.history.push())
+        width, height = self.width, self.height
 
         # Bird physics
-        bird_vel += GRAVITY
-        bird_y += bird_vel
-        bird_rect = pygame.Rect(BIRD_X, int(bird_y), bird_img.get_width(), bird_img.get_height())
-
-        # Pipe management
-        now = pygame.time.get_ticks()
-        if now - last_pipe > PIPE_FREQ:
-            last_pipe = now
-            pipe_height = random.randint(60, height - PIPE_GAP - base_height - 60)
-            top_rect = pygame.Rect(
-                width, pipe_height - pipe_img.get_height(), pipe_img.get_width(), pipe_img.get_height())
-            bottom_rect = pygame.Rect(
-                width, pipe_height + PIPE_GAP, pipe_img.get_width(), pipe_img.get_height())
-            pipes.append({'top': top_rect, 'bottom': bottom_rect, 'scored': False})
-
-        for pipe in pipes:
+        self.bird_vel += GRAVITY
+        self.bird_y += self.bird_vel
+        bird_rect = pygame.Rect(self.bird_x, int(self.bird_y), BIRD_SIZE[0], BIRD_SIZE[1])
+
+        # Pipe management (timed in game frames so pausing doesn't skew it)
+        self.pipe_timer += 1000 / FPS
+        if self.pipe_timer > PIPE_FREQ:
+            self.pipe_timer = 0
+            self.rng = xorshift32(self.rng)
+            span = height - PIPE_GAP - BASE_HEIGHT - 120
+            pipe_height = 60 + self.rng % (span + 1)
+            self.pipes.append(make_pipe(width, pipe_height))
+
+        for pipe in self.pipes:
             pipe['top'].x -= PIPE_SPEED
             pipe['bottom'].x -= PIPE_SPEED
 
-        pipes = [p for p in pipes if p['top'].right > 0]
+        self.pipes = [p for p in self.pipes if p['top'].right > 0]
 
-        base_x = (base_x - PIPE_SPEED) % width
+        self.base_x = (self.base_x - PIPE_SPEED) % width
 
         # Collision
-        if check_collision(bird_rect, pipes, base_y):
-            running = False
+        if check_collision(bird_rect, self.pipes, self.base_y, self.masks):
+            self.game_over = True
+            self.play_sound("lose")
 
         # Score
-        for pipe in pipes:
-            if not pipe['scored'] and pipe['top'].right < BIRD_X:
-                score += 1
+        for pipe in self.pipes:
+            if not pipe['scored'] and pipe['top'].right < self.bird_x:
+                self.score += 1
                 pipe['scored'] = True
 
-        # Drawing
-        screen.blit(background_img, (0, 0))
-        draw_pipes(screen, pipe_img, pipes)
+    def draw(self, screen):
+        width, height = self.width, self.height
+        if self.game_over:
+            # Game Over screen
+            screen.fill((0,0,0))
+            game_over_text = self.font.render("Game Over! Press ESC to return to menu.", quality.current.antialias, (255, 0, 0))
+            screen.blit(game_over_text, (width // 2 - game_over_text.get_width() // 2, height // 2))
+            if self.history.count:
+                screen.blit(self.rewind_hint, (width // 2 - self.rewind_hint.get_width() // 2, height // 2 + 50))
+            return
+
+        screen.blit(self.background_img, (0, 0))
+        draw_pipes(screen, self.pipe_img, self.pipes, self.top_pipe_img)
         # Draw base twice for seamless scrolling
-        screen.blit(base_img, (base_x, base_y))
-        screen.blit(base_img, (base_x - width, base_y))
-        screen.blit(bird_img, (BIRD_X, bird_y))
-        score_surf = font.render(str(score), True, (0, 0, 0))
+        screen.blit(self.base_img, (self.base_x, self.base_y))
+        screen.blit(self.base_img, (self.base_x - width, self.base_y))
+        screen.blit(self.bird_img, (self.bird_x, self.bird_y))
+        score_surf = self.font.render(str(self.score), quality.current.antialias, (0, 0, 0))
         screen.blit(score_surf, (width//2 - score_surf.get_width()//2, 30))
-        pygame.display.flip()
-        clock.tick(60)
-
-    # Game Over screen (after game loop ends)
-    screen.fill((0,0,0))
-    game_over_text = font.render("Game Over! Press ESC to return to menu.", True, (255, 0, 0))
-    screen.blit(game_over_text, (width // 2 - game_over_text.get_width() // 2, height // 2))
-    pygame.display.flip()
-
-    # Wait for ESC to return
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                waiting = False
-            elif event.type == pygame.QUIT:
-                waiting = False
+        if self.rewinding:
+            screen.blit(self.rewind_text, (20, 30))
+        elif self.paused:
+            screen.blit(self.paused_text, (width // 2 - self.paused_text.get_width() // 2, height // 2 - 60))
+
+def run_flappybird(screen):
+    SceneManager(screen).run(FlappyBirdGame(screen.get_size()))
 
 # Uncomment below to test standalone:
 # pygame.init()
@@ -0,0 +1,96 @@
+import os
+import time
+
+import quality
+from scenes import FrameObserver
+
+# Adaptive quality. Each frame's work, from input handling to the end of
+# the display flip, is measured against the budget the scene's fps gives
+# clock.tick(). Every WINDOW frames the governor looks at the 90th
+# percentile: above DOWN_AT of the budget it drops quality.current one
+# level straight away; only after UP_WINDOWS windows in a row below UP_AT
+# does it go back up a level. The gap between the two thresholds and the
+# longer wait to step up keep it from flapping between levels, and each
+# step up that has to be undone doubles that wait, up to MAX_UP_WINDOWS.
+# Level changes are kept in `changes`; GAME_QUALITY_LOG=1 prints them when
+# the game loop ends.
+WINDOW = 30
+DOWN_AT = 0.9
+UP_AT = 0.5
+UP_WINDOWS = 4
+MAX_UP_WINDOWS = 64
+
+
+class QualityGovernor(FrameObserver):
+    def __init__(self, settings=None, window=WINDOW, down_at=DOWN_AT,
+                 up_at=UP_AT, up_windows=UP_WINDOWS, log=False):
+        self.log = log
+        self.settings = quality.current if settings is None else settings
+        self.window = window
+        self.down_at = down_at
+        self.up_at = up_at
+        self.up_windows = up_windows
+        self.loads = []  # frame time / budget, this window
+        self.calm = 0  # windows in a row with headroom
+        self.wait = up_windows  # calm windows needed to step up
+        self.raised = False  # the last change was a step up
+        self.start = None
+        self.scene = None
+        self.changes = []  # (scene caption, old level, new level, load)
+
+    @classmethod
+    def from_env(cls):
+        return cls(log=bool(os.environ.get("GAME_QUALITY_LOG")))
+
+    def on_input(self, scene, events, keys):
+        self.start = time.perf_counter()
+
+    def after_present(self, scene):
+        if self.start is None:
+            return
+        load = (time.perf_counter() - self.start) * scene.fps
+        self.start = None
+        if scene is not self.scene:
+            # Loading a scene and its first frames aren't representative
+            self.scene = scene
+            self.loads.clear()
+            self.calm = 0
+            self.wait = self.up_windows
+            self.raised = False
+            return
+        self.loads.append(load)
+        if len(self.loads) < self.window:
+            return
+        self.loads.sort()
+        load = self.loads[int(0.9 * len(self.loads))]
+        self.loads.clear()
+        settings = self.settings
+        if load > self.down_at:
+            self.calm = 0
+            if settings.level > 0:
+                if self.raised:
+                    self.wait = min(2 * self.wait, MAX_UP_WINDOWS)
+                self.raised = False
+                self.change(scene, settings.level - 1, load)
+        elif load < self.up_at:
+            self.calm += 1
+            if self.calm >= self.wait and not settings.best:
+                self.calm = 0
+                self.raised = True
+                self.change(scene, settings.level + 1, load)
+        else:
+            self.calm = 0
+
+    def change(self, scene, level, load):
+        old = self.settings.name
+        self.settings.set_level(level)
+        self.changes.append((scene.caption, old, self.settings.name, load))
+
+    def close(self):
+        if not self.log:
+            return
+        for caption, old, new, load in self.changes:
+            print(f"Quality {old} -> {new} in {caption} "
+                  f"(p90 frame at {100 * load:.0f}% of budget)")
+        print(f"Quality ended at {self.settings.name} after "
+              f"{len(self.changes)} changes")
@@ -0,0 +1,124 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+import pygame
+
+from scenes import FrameObserver
+
+# Input-to-photon latency. Every key or mouse press is timestamped when it
+# comes out of pygame.event.get() (or first shows up in key.get_pressed()
+# without an event) together with the scene's latency_probe(). The sample
+# ends at the first display flip after which the probe differs, i.e. the
+# first frame that shows the effect of the input. Presses with no visible
+# effect within `timeout` seconds are counted as unanswered.
+# OS and driver delay before SDL queues the event is not visible here.
+WATCHED_KEYS = [
+    pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT,
+    pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d,
+    pygame.K_SPACE, pygame.K_LCTRL, pygame.K_RCTRL,
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1,
+                max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LatencyTracker(FrameObserver):
+    def __init__(self, output=None, timeout=1.0):
+        self.output = output
+        self.timeout = timeout
+        self.samples = defaultdict(list)  # (game, input) -> [seconds]
+        self.frames = defaultdict(list)  # (game, input) -> [frames]
+        self.unanswered = defaultdict(int)
+        self.pending = []  # [start, frame, scene, input, probe]
+        self.held = set()
+        self.frame = 0
+
+    @classmethod
+    def from_env(cls):
+        value = os.environ["GAME_LATENCY"]
+        return cls(output=value if value.endswith(".json") else None)
+
+    def on_input(self, scene, events, keys):
+        now = time.perf_counter()
+        self.frame += 1
+        inputs = []
+        from_events = set()
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                inputs.append(pygame.key.name(event.key))
+                from_events.add(event.key)
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                inputs.append(f"mouse {event.button}")
+
+        held = {key for key in WATCHED_KEYS if keys[key]}
+        for key in held - self.held - from_events:
+            inputs.append(pygame.key.name(key))
+        self.held = held
+
+        if inputs:
+            probe = scene.latency_probe()
+            if probe is not None:
+                for name in inputs:
+                    self.pending.append([now, self.frame, scene, name, probe])
+
+    def after_present(self, scene):
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        probe = scene.latency_probe()
+        still_pending = []
+        for item in self.pending:
+            start, frame, source, name, before = item
+            key = (source.caption, name)
+            if source is not scene:
+                self.unanswered[key] += 1
+            elif probe != before:
+                self.samples[key].append(now - start)
+                self.frames[key].append(self.frame - frame)
+            elif now - start > self.timeout:
+                self.unanswered[key] += 1
+            else:
+                still_pending.append(item)
+        self.pending = still_pending
+
+    def report(self):
+        rows = []
+        for key in sorted(set(self.samples) | set(self.unanswered)):
+            values = sorted(self.samples.get(key, []))
+            frames = sorted(self.frames.get(key, []))
+            rows.append({
+                "game": key[0],
+                "input": key[1],
+                "count": len(values),
+                "unanswered": self.unanswered.get(key, 0),
+                "p50_ms": 1000 * percentile(values, 50),
+                "p95_ms": 1000 * percentile(values, 95),
+                "p99_ms": 1000 * percentile(values, 99),
+                "max_ms": 1000 * (values[-1] if values else 0.0),
+                "p50_frames": percentile(frames, 50),
+            })
+        return rows
+
+    def close(self):
+        rows = self.report()
+        if self.output:
+            with open(self.output, "w") as f:
+                json.dump(rows, f, indent=1)
+            print(f"Wrote input latency report to {self.output}")
+            return
+        if not rows:
+            return
+        print(f"{'game':18} {'input':10} {'count':>6} {'p50':>8} {'p95':>8} "
+              f"{'p99':>8} {'max':>8} {'frames':>6} {'lost':>5}")
+        for row in rows:
+            print(f"{row['game']:18} {row['input']:10} {row['count']:>6} "
+                  f"{row['p50_ms']:>6.1f}ms {row['p95_ms']:>6.1f}ms "
+                  f"{row['p99_ms']:>6.1f}ms {row['max_ms']:>6.1f}ms "
+                  f"{row['p50_frames']:>6} {row['unanswered']:>5}")
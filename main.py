@@ -1,36 +1,58 @@
 import pygame
 import sys
-import traceback
 
-from snake import run_snake
-from brickout import run_brickout
-from shooter import run_shooter
-from tictactoe import run_tictactoe
-from flappybird import run_flappybird
+import sound
+from previews import PreviewPanel
+from scenes import Scene, SceneManager
+from viewport import ScaledDisplay
+from snake import SnakeGame
+from brickout import BrickoutGame
+from shooter import ShooterGame
+from shooter_bot import ShooterBot
+from tictactoe import GomokuGame, TicTacToeGame
+from flappybird import FlappyBirdGame
 
 # Initialize
+sound.pre_init()
 pygame.init()
 WIDTH, HEIGHT = 700, 500
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+screen = ScaledDisplay.from_env((WIDTH, HEIGHT))
 pygame.display.set_caption("Game Menu")
 
 # Fonts
 font = pygame.font.SysFont("arial", 36)
+small_font = pygame.font.SysFont("arial", 16)
 title_font = pygame.font.SysFont("arial", 60, bold=True)
 
 # Menu options
 MENU_OPTIONS = [
-    "Snake", "Brickout", "Tictactoe",
-    "2-Player Shooter", "Flappy Bird", "Quit"
+    "Snake", "Brickout", "Tictactoe", "Gomoku",
+    "2-Player Shooter", "1-Player Shooter", "Flappy Bird", "Quit"
+]
+
+# Scene factory for each menu option (None quits)
+MENU_SCENES = [
+    SnakeGame, BrickoutGame, TicTacToeGame, GomokuGame,
+    ShooterGame, lambda: ShooterGame(ShooterBot()), FlappyBirdGame, None
+]
+
+# Live tile preview for each menu option, as (env name, env options)
+MENU_PREVIEWS = [
+    ("snake", {}), ("brickout", {}), ("tictactoe", {}), ("gomoku", {}),
+    ("shooter", {}), ("shooter", {"bot": ShooterBot()}), ("flappybird", {}),
+    None
 ]
 
 # --- Menu Layout ---
 COLS = 2
-ROWS = 3
+ROWS = 4
 BUTTON_WIDTH = 260
 BUTTON_HEIGHT = 60
 BUTTON_MARGIN_X = 40
 BUTTON_MARGIN_Y = 18
+THUMB_MARGIN = 4
+THUMB_HEIGHT = BUTTON_HEIGHT - 2 * THUMB_MARGIN
+THUMB_WIDTH = THUMB_HEIGHT * WIDTH // HEIGHT
 
 # Colors
 BG_COLOR = (20, 20, 30)
@@ -60,63 +82,123 @@ for row in range(ROWS):
         )
         button_rects.append(rect)
 
+# With previews, each tile shows the thumbnail on its left and the label
+# in the space to the right of it
+thumb_rects = [
+    pygame.Rect(rect.x + THUMB_MARGIN, rect.y + THUMB_MARGIN,
+                THUMB_WIDTH, THUMB_HEIGHT)
+    for rect in button_rects
+]
+label_rects = [
+    pygame.Rect(thumb.right, rect.y, rect.right - thumb.right, rect.height)
+    for rect, thumb in zip(button_rects, thumb_rects)
+]
 
-def draw_menu(mouse_pos=None):
-    screen.fill(BG_COLOR)
-
-    # Draw title
-    title_text = title_font.render("Games Mania", True, TITLE_COLOR)
-    screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 50))
-
-    # Draw menu background
-    menu_bg_rect = pygame.Rect(
-        menu_x - 20, menu_y - 20, menu_width + 40, menu_height + 40)
-    pygame.draw.rect(screen, MENU_BG_COLOR, menu_bg_rect, border_radius=22)
-
-    # Draw buttons
-    for idx, option in enumerate(MENU_OPTIONS):
-        rect = button_rects[idx]
-        is_hovered = mouse_pos and rect.collidepoint(mouse_pos)
-        text_color = HIGHLIGHT_COLOR if is_hovered else TEXT_COLOR
-        bg_color = BUTTON_COLOR
-
-        pygame.draw.rect(screen, bg_color, rect, border_radius=14)
-        text = font.render(option, True, text_color)
-        text_rect = text.get_rect(center=rect.center)
-        screen.blit(text, text_rect)
 
-    pygame.display.flip()
+def fit_label(label, width):
+    if label.get_width() <= width:
+        return label
+    height = label.get_height() * width // label.get_width()
+    return pygame.transform.smoothscale(label, (width, height))
+
+
+class MenuScene(Scene):
+    caption = "Game Menu"
+    fps = 30
+
+    def __init__(self):
+        super().__init__()
+        self.games = {}  # menu index -> scene, kept alive between visits
+        self.mouse_pos = None
+        self.previews = PreviewPanel.from_env([
+            (thumb_rects[idx], spec[0], spec[1])
+            for idx, spec in enumerate(MENU_PREVIEWS) if spec is not None
+        ])
+
+        # Everything but the hover highlight is static, so draw it once
+        self.background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.background.fill(BG_COLOR)
+
+        # Draw title
+        title_text = title_font.render("Games Mania", True, TITLE_COLOR)
+        self.background.blit(
+            title_text, (WIDTH // 2 - title_text.get_width() // 2, 50))
+
+        # Draw menu background
+        menu_bg_rect = pygame.Rect(
+            menu_x - 20, menu_y - 20, menu_width + 40, menu_height + 40)
+        pygame.draw.rect(self.background, MENU_BG_COLOR,
+                         menu_bg_rect, border_radius=22)
+
+        # Draw buttons
+        self.labels = []
+        self.label_centers = []
+        for idx, option in enumerate(MENU_OPTIONS):
+            rect = button_rects[idx]
+            pygame.draw.rect(self.background, BUTTON_COLOR,
+                             rect, border_radius=14)
+            text = font.render(option, True, TEXT_COLOR)
+            label = font.render(option, True, HIGHLIGHT_COLOR)
+            center = rect.center
+            if self.previews.enabled and MENU_PREVIEWS[idx] is not None:
+                area = label_rects[idx]
+                text = fit_label(text, area.width - 2 * THUMB_MARGIN)
+                label = fit_label(label, area.width - 2 * THUMB_MARGIN)
+                center = area.center
+            self.background.blit(text, text.get_rect(center=center))
+            self.labels.append(label)
+            self.label_centers.append(center)
+        self.paused_label = small_font.render("paused", True, HIGHLIGHT_COLOR)
+
+    def on_enter(self):
+        super().on_enter()
+        self.previews.resume()
+
+    def open_game(self, idx):
+        make_scene = MENU_SCENES[idx]
+        if make_scene is None:
+            self.manager.stop()
+            return
+        game = self.games.get(idx)
+        if game is None:
+            game = self.games[idx] = make_scene()
+        elif game.finished:
+            game.reset()
+        self.manager.push(game)
+
+    def handle_event(self, event):
+        self.previews.handle_event(event)
+        if event.type == pygame.QUIT:
+            self.manager.stop()
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            for idx, rect in enumerate(button_rects):
+                if rect.collidepoint(event.pos):
+                    self.open_game(idx)
+                    break
+
+    def update(self, keys):
+        self.mouse_pos = self.manager.mouse_pos()
+        self.previews.update()
+
+    def draw(self, screen):
+        screen.blit(self.background, (0, 0))
+        for idx, rect in enumerate(button_rects):
+            if self.mouse_pos and rect.collidepoint(self.mouse_pos):
+                pygame.draw.rect(screen, BUTTON_COLOR, rect, border_radius=14)
+                label = self.labels[idx]
+                screen.blit(label, label.get_rect(center=self.label_centers[idx]))
+            game = self.games.get(idx)
+            if game is not None and not game.finished:
+                screen.blit(self.paused_label, (
+                    rect.right - self.paused_label.get_width() - 10,
+                    rect.bottom - self.paused_label.get_height() - 4))
+        self.previews.draw(screen)
 
 
 def main_menu():
-    while True:
-        mouse_pos = pygame.mouse.get_pos()
-        draw_menu(mouse_pos)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                for idx, rect in enumerate(button_rects):
-                    if rect.collidepoint(event.pos):
-                        try:
-                            if idx == 0:
-                                run_snake(screen)
-                            elif idx == 1:
-                                run_brickout(screen)
-                            elif idx == 2:
-                                run_tictactoe(screen)
-                            elif idx == 3:
-                                run_shooter(screen)
-                            elif idx == 4:
-                                run_flappybird(screen)
-                            elif idx == 5:
-                                pygame.quit()
-                                sys.exit()
-                        except Exception as e:
-                            print(f"Error running {MENU_OPTIONS[idx]}: {e}")
-                            traceback.print_exc()
-        pygame.time.Clock().tick(30)
+    SceneManager(screen).run(MenuScene())
+    pygame.quit()
+    sys.exit()
 
 
 if __name__ == "__main__":
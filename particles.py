@@ -0,0 +1,163 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+
+# Pooled particles. A pool is a structure of preallocated NumPy arrays
+# (position, velocity, remaining life, palette index) whose live particles
+# are packed into the first `count` slots. update() moves, ages and culls
+# every particle in a few in-place vectorized passes, and draw() writes
+# them all as 2x2 dots through one surfarray view. Emitting past the
+# capacity drops the extra particles, so the count never exceeds it.
+# `density` scales every burst down, e.g. by the quality level.
+MAX_PARTICLES = 4096
+GRAVITY = 0.15  # pixels per frame per frame
+
+
+class ParticlePool:
+    def __init__(self, capacity=MAX_PARTICLES, gravity=GRAVITY, seed=None):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.count = 0
+        self.density = 1.0  # share of each burst actually emitted
+        self.dropped = 0  # particles not emitted because the pool was full
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int16)  # frames left
+        self.color = np.zeros(capacity, np.uint8)  # index into palette
+        self.arrays = [self.x, self.y, self.vx, self.vy, self.life, self.color]
+        self.palette = []  # RGB tuples
+        self.mapped = {}  # surface pixel format -> palette as pixel values
+
+        # Scratch space, so update() and draw() allocate no arrays
+        self.scratch = [np.zeros_like(a) for a in self.arrays]
+        self.alive = np.zeros(capacity, bool)
+        self.test = np.zeros(capacity, bool)
+        self.ix = np.zeros(capacity, np.intp)
+        self.iy = np.zeros(capacity, np.intp)
+        self.pixels = np.zeros(capacity, np.uint32)
+
+    def clear(self):
+        self.count = 0
+
+    def color_index(self, rgb):
+        if rgb not in self.palette:
+            self.palette.append(rgb)
+            self.mapped.clear()
+        return self.palette.index(rgb)
+
+    def emit(self, x, y, count, color, speed=(1.0, 4.0),
+             angle=(0.0, 2 * math.pi), life=(20, 40)):
+        # Burst of particles from (x, y) with random speeds, directions
+        # (radians, y pointing down) and lifetimes (frames) in the ranges
+        start = self.count
+        count = round(count * self.density)
+        count, wanted = min(count, self.capacity - start), count
+        self.dropped += wanted - count
+        if count <= 0:
+            return
+        end = start + count
+        theta = self.rng.uniform(angle[0], angle[1], count)
+        velocity = self.rng.uniform(speed[0], speed[1], count)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = velocity * np.cos(theta)
+        self.vy[start:end] = velocity * np.sin(theta)
+        self.life[start:end] = self.rng.integers(life[0], life[1], count,
+                                                 endpoint=True)
+        self.color[start:end] = self.color_index(color)
+        self.count = end
+
+    def update(self, bounds):
+        # One frame of motion; particles that die or leave `bounds`
+        # (a Rect) are removed
+        n = self.count
+        if not n:
+            return
+        x, y = self.x[:n], self.y[:n]
+        vy = self.vy[:n]
+        vy += self.gravity
+        x += self.vx[:n]
+        y += vy
+        self.life[:n] -= 1
+
+        alive, test = self.alive[:n], self.test[:n]
+        np.greater(self.life[:n], 0, out=alive)
+        # Leave room for the 2x2 dot inside bounds
+        for values, low, high in ((x, bounds.left, bounds.right - 2),
+                                  (y, bounds.top, bounds.bottom - 2)):
+            np.greater_equal(values, low, out=test)
+            alive &= test
+            np.less(values, high, out=test)
+            alive &= test
+
+        kept = int(np.count_nonzero(alive))
+        if kept < n:
+            for values, scratch in zip(self.arrays, self.scratch):
+                np.compress(alive, values[:n], out=scratch[:kept])
+                values[:kept] = scratch[:kept]
+            self.count = kept
+
+    def palette_values(self, surface):
+        key = (surface.get_bitsize(), surface.get_masks())
+        values = self.mapped.get(key)
+        if values is None:
+            # map_rgb() can come back negative for 32-bit alpha formats
+            mapped = [surface.map_rgb(rgb) & 0xFFFFFFFF for rgb in self.palette]
+            values = self.mapped[key] = np.array(mapped or [0], np.uint32)
+        return values
+
+    def draw(self, surface):
+        n = self.count
+        if not n:
+            return
+        ix, iy = self.ix[:n], self.iy[:n]
+        np.copyto(ix, self.x[:n], casting="unsafe")
+        np.copyto(iy, self.y[:n], casting="unsafe")
+        pixels = np.take(self.palette_values(surface), self.color[:n],
+                         out=self.pixels[:n])
+        target = pygame.surfarray.pixels2d(surface)
+        try:
+            target[ix, iy] = pixels
+            ix += 1
+            target[ix, iy] = pixels
+            iy += 1
+            target[ix, iy] = pixels
+            ix -= 1
+            target[ix, iy] = pixels
+        finally:
+            # Unlock the surface so it can be blitted again
+            del target
+
+
+def benchmark(count=MAX_PARTICLES, frames=300):
+    surface = pygame.Surface((700, 500)).convert()
+    bounds = surface.get_rect()
+    pool = ParticlePool(count, seed=0)
+    update_time = draw_time = 0.0
+    for _ in range(frames):
+        # Keep the pool full: refill whatever died last frame
+        pool.emit(350, 250, count - pool.count, (255, 215, 0),
+                  speed=(0.5, 3.0), life=(60, 120))
+        start = time.perf_counter()
+        pool.update(bounds)
+        update_time += time.perf_counter() - start
+        start = time.perf_counter()
+        pool.draw(surface)
+        draw_time += time.perf_counter() - start
+    print(f"{count} particles: update {1000 * update_time / frames:.3f} ms, "
+          f"draw {1000 * draw_time / frames:.3f} ms per frame")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((700, 500))
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else MAX_PARTICLES)
@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+
+# Load-time pixel format normalization. Every sprite is converted once to
+# the cheapest display format that still draws it correctly:
+#   opaque images          -> convert()
+#   on/off transparency    -> convert() + colorkey with RLE acceleration
+#   soft (partial) alpha   -> convert_alpha()
+# Images are classified before scaling (scale_image): smoothscale on a
+# surface with an alpha channel blends alpha too, leaving 251-253 on every
+# pixel of an opaque background, which would then count as soft alpha.
+COLORKEY_CANDIDATES = [(255, 0, 255), (0, 255, 0), (1, 2, 3)]
+
+_alpha_masks = None
+
+
+def display_alpha_masks():
+    global _alpha_masks
+    if _alpha_masks is None:
+        _alpha_masks = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+    return _alpha_masks
+
+
+def alpha_kind(surface):
+    # "opaque", "colorkey" or "alpha" for a 32-bit surface with per-pixel alpha
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    try:
+        if alpha.min() == 255:
+            return "opaque"
+        if ((alpha == 0) | (alpha == 255)).all():
+            return "colorkey"
+        return "alpha"
+    finally:
+        del alpha
+
+
+def scale_image(image, size, smooth=True):
+    # Scales a freshly loaded image; opaque images lose their alpha channel
+    # first so the result stays opaque
+    if image.get_flags() & pygame.SRCALPHA:
+        if image.get_bitsize() != 32:
+            image = image.convert_alpha()
+        if alpha_kind(image) == "opaque":
+            image = image.convert()
+    elif image.get_colorkey() is None:
+        image = image.convert()
+    else:
+        image = image.convert_alpha()
+    if smooth:
+        return pygame.transform.smoothscale(image, size)
+    return pygame.transform.scale(image, size)
+
+
+def optimize(surface):
+    if not surface.get_flags() & pygame.SRCALPHA and surface.get_colorkey() is None:
+        return surface.convert()
+
+    if surface.get_flags() & pygame.SRCALPHA and surface.get_bitsize() == 32:
+        source = surface
+    else:
+        source = surface.convert_alpha()
+    kind = alpha_kind(source)
+
+    if kind == "alpha":
+        # Already in the display's alpha format (e.g. an atlas subsurface)
+        if source.get_masks() == display_alpha_masks():
+            return source
+        return source.convert_alpha()
+
+    opaque = source.convert()
+    if kind == "opaque":
+        return opaque
+
+    alpha = pygame.surfarray.pixels_alpha(source)
+    rgb = pygame.surfarray.pixels3d(opaque)
+    try:
+        visible = rgb[alpha == 255]
+        for key in COLORKEY_CANDIDATES:
+            if not (visible == key).all(axis=1).any():
+                break
+        else:
+            # Every candidate color is used by the sprite itself
+            return source.convert_alpha()
+        rgb[alpha == 0] = np.array(key, dtype=rgb.dtype)
+    finally:
+        del alpha, rgb
+    opaque.set_colorkey(key, pygame.RLEACCEL)
+    return opaque
+
+
+def time_blits(surface, target, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        target.blit(surface, (0, 0))
+    return (time.perf_counter() - start) * 1e6 / count
+
+
+def format_name(surface):
+    if surface.get_colorkey() is not None:
+        return "colorkey+RLE"
+    if surface.get_flags() & pygame.SRCALPHA:
+        return "per-pixel alpha"
+    return "opaque"
+
+
+def benchmark(count=200):
+    # Times the surfaces the games actually load, through each module's
+    # load_and_scale_image (atlas first, then the image file), against the
+    # raw smoothscaled convert_alpha() image they used to get.
+    # Imported here so the games can import this module at load time
+    import atlas
+    import brickout
+    import flappybird
+    import shooter
+    import snake
+
+    target = pygame.Surface((700, 500)).convert()
+    print(f"{'asset':48} {'size':>9} {'raw':>9} {'loaded':>9}  from   format")
+    for module in (snake, brickout, shooter, flappybird):
+        for spec in module.SPRITES:
+            path, size = spec[0], tuple(spec[1])
+            smooth = spec[2] if len(spec) > 2 else True
+            raw = pygame.image.load(os.path.join(atlas.BASE_DIR, path)).convert_alpha()
+            if smooth:
+                raw = pygame.transform.smoothscale(raw, size)
+            else:
+                raw = pygame.transform.scale(raw, size)
+            loaded = module.load_and_scale_image(path, size)
+            origin = "file" if atlas.lookup(path, size) is None else "atlas"
+            timings = [time_blits(s, target, count) for s in (raw, loaded)]
+            print(f"{path:48} {size[0]:>4}x{size[1]:<4} "
+                  + " ".join(f"{t:>7.1f}us" for t in timings)
+                  + f"  {origin:5}  {format_name(loaded)}")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((700, 500))
+    try:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    except (OSError, pygame.error) as e:
+        print(f"Error running benchmark: {e}")
+        sys.exit(1)
@@ -0,0 +1,336 @@
+import math
+import os
+import time
+
+import pygame
+
+import bots
+import brickout
+import envs
+import flappybird
+import pixelformat
+import quality
+import shooter
+import snake
+import tictactoe
+
+# Live thumbnails for the menu tiles. Each preview is a headless env played
+# by a bots.py autopilot. The game's state is drawn straight into the
+# thumbnail by one of the THUMBNAILS functions below, in the game's own
+# 700x500 coordinates through a Thumbnail: positions are scaled on every
+# call and sprites once each, and text is left out. A thumbnail is only
+# redrawn when the env's state has changed since the last redraw. Games
+# without a THUMBNAILS function draw full size into a shared scratch
+# surface that is scaled down, which costs far more, so those redraw at
+# most DRAW_RATE times a second while the simulation steps at the game's
+# own rate in between.
+# Previews take turns round-robin, and a menu frame only starts turns while
+# its budget lasts, so the cost per frame stays around budget_ms however
+# many tiles there are; previews that miss turns just run slower. A turn
+# isn't started when its recent average cost (stepping, plus redrawing if
+# one is due) would overrun the budget, though every frame gets at least
+# one. Nothing
+# runs while the window is unfocused or minimized, or after the menu has
+# had no input for IDLE_SECONDS.
+BUDGET_MS = 4.0
+IDLE_SECONDS = 60
+MAX_STEPS_PER_TURN = 4  # previews that fall behind slow down instead
+DRAW_RATE = 10  # full-size redraws per second, at most
+PLACEHOLDER_COLOR = (30, 30, 45)
+MAX_SPRITES = 64  # scaled sprites kept per thumbnail
+MIN_GRID_SPACING = 3  # pixels between board lines in a thumbnail
+
+# Env steps per second, when not the game's fps
+STEP_RATES = {
+    "snake": snake.MOVE_RATE,
+    "tictactoe": 1000 / tictactoe.AI_DELAY,
+    "gomoku": 1000 / tictactoe.AI_DELAY,
+}
+# Short AI searches keep a board game's turn within the frame budget
+ENV_OPTIONS = {
+    "tictactoe": {"think_time": 0.002},
+    "gomoku": {"think_time": 0.002},
+}
+
+
+class Thumbnail:
+    # A thumbnail-sized surface drawn on in logical coordinates
+    def __init__(self, surface, logical_size=(700, 500)):
+        self.surface = surface
+        self.sx = surface.get_width() / logical_size[0]
+        self.sy = surface.get_height() / logical_size[1]
+        self.sprites = {}  # id(image) -> (image, scaled image)
+
+    def point(self, pos):
+        return round(pos[0] * self.sx), round(pos[1] * self.sy)
+
+    def rect(self, rect):
+        x, y, w, h = rect
+        return pygame.Rect(round(x * self.sx), round(y * self.sy),
+                           max(1, round(w * self.sx)), max(1, round(h * self.sy)))
+
+    def blit(self, image, pos):
+        # The image is kept with its scaled copy, so its id isn't reused
+        entry = self.sprites.get(id(image))
+        if entry is None or entry[0] is not image:
+            if len(self.sprites) >= MAX_SPRITES:
+                self.sprites.clear()
+            width, height = image.get_size()
+            size = (max(1, round(width * self.sx)), max(1, round(height * self.sy)))
+            entry = (image, pixelformat.scale_image(image, size))
+            self.sprites[id(image)] = entry
+        self.surface.blit(entry[1], self.point(pos))
+
+    def fill(self, color, rect=None):
+        self.surface.fill(color, None if rect is None else self.rect(rect))
+
+    def frame(self, color, rect):
+        # Rounded outwards, so what it frames can't cover it
+        x, y, w, h = rect
+        left, top = math.floor(x * self.sx), math.floor(y * self.sy)
+        right = math.ceil((x + w) * self.sx)
+        bottom = math.ceil((y + h) * self.sy)
+        pygame.draw.rect(self.surface, color,
+                         (left, top, right - left, bottom - top), 1)
+
+    def title(self, text, top):
+        self.blit(text, ((self.surface.get_width() / self.sx
+                          - text.get_width()) // 2, top))
+
+    def line(self, color, start, end):
+        pygame.draw.line(self.surface, color, self.point(start), self.point(end))
+
+    def circle(self, color, center, radius):
+        radius = max(1, round(radius * self.sx))
+        # Outlines only while there is room for a hole
+        pygame.draw.circle(self.surface, color, self.point(center), radius,
+                           1 if radius > 2 else 0)
+
+
+def draw_snake(thumb, game):
+    thumb.blit(game.bg_img, (0, 0))
+    thumb.frame((0, 255, 0), (snake.BOX_X - 3, snake.BOX_Y - 3,
+                              snake.BOX_WIDTH + 6, snake.BOX_HEIGHT + 6))
+    thumb.title(game.title_text, snake.BOX_Y - 60)
+    positions = game.snake.positions
+    for i, (col, row) in enumerate(positions):
+        if i == 0:
+            image = game.head_imgs[game.snake.next_direction()]
+        else:
+            image = game.snake_body_img
+        thumb.blit(image, (snake.BOX_X + col * snake.CELL_SIZE,
+                           snake.BOX_Y + row * snake.CELL_SIZE))
+    col, row = game.food.position
+    thumb.blit(game.food_img, (snake.BOX_X + col * snake.CELL_SIZE,
+                               snake.BOX_Y + row * snake.CELL_SIZE))
+
+
+def draw_brickout(thumb, game):
+    if game.bg_img:
+        thumb.blit(game.bg_img, (0, 0))
+    else:
+        thumb.fill(brickout.BLACK)
+    thumb.frame((150, 150, 255), (brickout.BOX_X - 3, brickout.BOX_Y - 3,
+                                  brickout.BOX_WIDTH + 6, brickout.BOX_HEIGHT + 6))
+    thumb.title(game.title_text, brickout.BOX_Y - 60)
+    for brick_rect in game.bricks:
+        if game.brick_img:
+            thumb.blit(game.brick_img, brick_rect)
+        else:
+            thumb.fill(brickout.BRICK_COLOR, brick_rect)
+    if game.paddle_img:
+        thumb.blit(game.paddle_img, game.paddle)
+    else:
+        thumb.fill(brickout.WHITE, game.paddle)
+    radius = brickout.BALL_RADIUS
+    if game.ball_img:
+        thumb.blit(game.ball_img, (game.ball_x - radius, game.ball_y - radius))
+    else:
+        thumb.circle((220, 20, 60), (game.ball_x, game.ball_y), radius)
+
+
+def draw_flappybird(thumb, game):
+    thumb.blit(game.background_img, (0, 0))
+    for pipe in game.pipes:
+        thumb.blit(game.top_pipe_img, pipe['top'].topleft)
+        thumb.blit(game.pipe_img, pipe['bottom'].topleft)
+    thumb.blit(game.base_img, (game.base_x, game.base_y))
+    thumb.blit(game.base_img, (game.base_x - game.width, game.base_y))
+    thumb.blit(game.bird_img, (game.bird_x, game.bird_y))
+
+
+def draw_shooter(thumb, game):
+    thumb.blit(game.space_bg, (0, 0))
+    thumb.fill(shooter.BLACK, shooter.BORDER)
+    thumb.blit(game.yellow_ship, game.yellow.topleft)
+    thumb.blit(game.red_ship, game.red.topleft)
+    for bullet in game.red_bullets:
+        thumb.fill(shooter.RED, bullet)
+    for bullet in game.yellow_bullets:
+        thumb.fill(shooter.YELLOW, bullet)
+
+
+def draw_tictactoe(thumb, game):
+    thumb.fill(tictactoe.BG_COLOR)
+    square, top = game.square, tictactoe.BOX_Y
+    left, right = game.box_x, game.box_x + game.box_width
+    bottom = top + game.box_height
+    thumb.frame((0, 255, 0), (left - 3, top - 3,
+                              game.box_width + 6, game.box_height + 6))
+    thumb.title(game.title_text, top - 60)
+    # Grid lines only while they stay a few pixels apart, as they would
+    # otherwise fill the board (scaling down blends them away)
+    if square * thumb.sx >= MIN_GRID_SPACING:
+        for i in range(1, game.rows):
+            thumb.line(tictactoe.LINE_COLOR, (left, top + i * square),
+                       (right, top + i * square))
+        for i in range(1, game.cols):
+            thumb.line(tictactoe.LINE_COLOR, (left + i * square, top),
+                       (left + i * square, bottom))
+    space = game.space
+    for row, col in zip(*game.board.nonzero()):
+        x, y = left + col * square, top + row * square
+        if game.board[row, col] == 1:
+            thumb.circle(tictactoe.CIRCLE_COLOR, (x + square // 2, y + square // 2),
+                         game.circle_radius)
+        else:
+            thumb.line(tictactoe.CROSS_COLOR, (x + space, y + square - space),
+                       (x + square - space, y + space))
+            thumb.line(tictactoe.CROSS_COLOR, (x + space, y + space),
+                       (x + square - space, y + square - space))
+
+
+THUMBNAILS = {
+    "snake": draw_snake,
+    "brickout": draw_brickout,
+    "flappybird": draw_flappybird,
+    "shooter": draw_shooter,
+    "tictactoe": draw_tictactoe,
+    "gomoku": draw_tictactoe,
+}
+
+
+class Preview:
+    def __init__(self, name, size, **options):
+        self.env = envs.make_env(name, **{**ENV_OPTIONS.get(name, {}), **options})
+        self.env.game.load_assets()
+        self.env.reset()
+        self.autopilot = bots.make_autopilot(name)
+        self.step_rate = STEP_RATES.get(name, self.env.game.fps)
+        self.image = pygame.Surface(size).convert()
+        self.image.fill(PLACEHOLDER_COLOR)
+        self.draw_thumbnail = THUMBNAILS.get(name)
+        self.thumbnail = Thumbnail(self.image, self.env.FRAME_SIZE)
+        self.owed = 0.0  # env steps due
+        self.last_turn = None
+        self.last_draw = None
+        self.drawn = None  # (state bytes, score) last drawn
+        self.cost = 0.0  # running average seconds stepping, per turn
+        self.draw_cost = 0.0  # running average seconds per redraw
+
+    def turn(self, now, scratch):
+        if self.last_turn is not None:
+            self.owed = min(self.owed + (now - self.last_turn) * self.step_rate,
+                            MAX_STEPS_PER_TURN)
+        self.last_turn = now
+        steps = int(self.owed)
+        self.owed -= steps
+        env, game = self.env, self.env.game
+        for _ in range(steps):
+            _, _, done, _ = env.step(self.autopilot.act(game))
+            if done:
+                env.reset()
+        start = time.perf_counter()
+        self.cost += 0.2 * (start - now - self.cost)
+        if not self.draw_due(now):
+            return
+        # env.state was filled in by the last step() or reset()
+        key = (env.state.tobytes(), env.score())
+        if key == self.drawn:
+            return
+        self.drawn = key
+        self.last_draw = now
+        if self.draw_thumbnail is not None:
+            self.draw_thumbnail(self.thumbnail, game)
+        else:
+            game.draw(scratch)
+            if quality.current.smooth_scaling:
+                pygame.transform.smoothscale(scratch, self.image.get_size(), self.image)
+            else:
+                pygame.transform.scale(scratch, self.image.get_size(), self.image)
+        self.draw_cost += 0.2 * (time.perf_counter() - start - self.draw_cost)
+
+    def draw_due(self, now):
+        return (self.draw_thumbnail is not None or self.last_draw is None
+                or now - self.last_draw >= 1 / DRAW_RATE)
+
+    def expected_cost(self, now):
+        return self.cost + (self.draw_cost if self.draw_due(now) else 0.0)
+
+
+class PreviewPanel:
+    def __init__(self, specs, budget_ms=BUDGET_MS, logical_size=(700, 500)):
+        # specs: (thumbnail rect, env name, env options) per preview
+        self.budget = budget_ms / 1000
+        self.previews = []
+        if self.budget > 0:
+            for rect, name, options in specs:
+                try:
+                    self.previews.append((rect, Preview(name, rect.size, **options)))
+                except Exception as e:
+                    print(f"Error starting {name} preview: {e}")
+        self.scratch = None
+        if any(preview.draw_thumbnail is None for _, preview in self.previews):
+            self.scratch = pygame.Surface(logical_size).convert()
+        self.next = 0
+        self.focused = True
+        self.visible = True
+        self.last_input = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, specs):
+        # GAME_PREVIEW_BUDGET_MS sets the per-frame budget; 0 turns previews off
+        return cls(specs, float(os.environ.get("GAME_PREVIEW_BUDGET_MS", BUDGET_MS)))
+
+    @property
+    def enabled(self):
+        return bool(self.previews)
+
+    @property
+    def paused(self):
+        return (not self.focused or not self.visible
+                or time.perf_counter() - self.last_input > IDLE_SECONDS)
+
+    def resume(self):
+        # Restarts the idle timer, e.g. when the menu is shown again after a
+        # game, which may have outlasted IDLE_SECONDS
+        self.last_input = time.perf_counter()
+
+    def handle_event(self, event):
+        if event.type == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+        elif event.type == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        elif event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+            self.visible = False
+        elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN):
+            self.visible = True
+        elif event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN,
+                            pygame.KEYDOWN):
+            self.last_input = time.perf_counter()
+
+    def update(self):
+        if not self.previews or self.paused:
+            return
+        deadline = time.perf_counter() + self.budget
+        for turn in range(len(self.previews)):
+            preview = self.previews[self.next][1]
+            now = time.perf_counter()
+            if turn and now + preview.expected_cost(now) > deadline:
+                break
+            preview.turn(now, self.scratch)
+            self.next = (self.next + 1) % len(self.previews)
+
+    def draw(self, screen):
+        for rect, preview in self.previews:
+            screen.blit(preview.image, rect)
@@ -0,0 +1,168 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+
+import pygame
+
+from scenes import FrameObserver
+
+# On-demand cProfile capture of the game loop. Pressing PROFILE_KEY in any
+# scene profiles the next `frames` frames (pressing it again stops early);
+# GAME_PROFILE_FRAMES=<n> instead captures the first n frames, for headless
+# runs. The profiler is only enabled from the start of each frame's input
+# handling to the end of its display flip, so the time clock.tick() sleeps
+# doesn't count. When a capture ends it writes to `output_dir`:
+#   <game>-<time>.prof       raw stats, for pstats or snakeviz
+#   <game>-<time>.collapsed  "a;b;c <microseconds>" lines for flamegraph.pl,
+#                            speedscope and similar tools
+#   <game>-<time>.txt        the top functions by own and cumulative time
+# cProfile only keeps caller -> callee totals, not whole stacks, so the
+# collapsed stacks are rebuilt by walking down from the functions nothing
+# called and splitting each function's time between its callers in
+# proportion to the time spent under each. Recursive calls are folded into
+# their first appearance on a stack.
+PROFILE_KEY = pygame.K_F9
+PROFILE_FRAMES = 300
+TOP_FUNCTIONS = 25
+MIN_STACK_SECONDS = 1e-6  # stacks with less time are left out
+MAX_STACK_DEPTH = 64
+
+
+def function_label(func):
+    path, line, name = func
+    if path == "~":
+        # Built-ins are listed as ("~", 0, "<built-in method time.sleep>")
+        label = name.strip("<>")
+    else:
+        label = f"{name} ({os.path.basename(path)}:{line})"
+    # Flame graph tools split frames on ";" and the count on the last space
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats):
+    # {"a;b;c": seconds} from pstats.Stats.stats, which maps each function
+    # to (primitive calls, calls, own time, cumulative time, callers) with
+    # callers mapping caller -> (primitive calls, calls, own, cumulative)
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in stats.items()
+             if not entry[4] or all(caller not in stats for caller in entry[4])]
+
+    stacks = {}
+
+    def walk(func, seconds, path, on_path):
+        total = stats[func][3]
+        if total <= 0:
+            return
+        share = min(1.0, seconds / total)
+        own = stats[func][2] * share
+        if own >= MIN_STACK_SECONDS:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0.0) + own
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, cumulative in callees.get(func, ()):
+            child = cumulative * share
+            if callee in on_path or child < MIN_STACK_SECONDS:
+                continue
+            path.append(function_label(callee))
+            on_path.add(callee)
+            walk(callee, child, path, on_path)
+            on_path.discard(callee)
+            path.pop()
+
+    for root in roots:
+        walk(root, stats[root][3], [function_label(root)], {root})
+    return stacks
+
+
+class FrameProfiler(FrameObserver):
+    def __init__(self, frames=PROFILE_FRAMES, output_dir="profiles",
+                 top=TOP_FUNCTIONS, start=False):
+        self.frames = frames
+        self.output_dir = output_dir
+        self.top = top
+        self.profile = None
+        self.game = None
+        self.captured = 0
+        self.started = 0.0
+        self.pending_start = start
+
+    @classmethod
+    def from_env(cls):
+        frames = os.environ.get("GAME_PROFILE_FRAMES")
+        return cls(frames=int(frames) if frames else PROFILE_FRAMES,
+                   output_dir=os.environ.get("GAME_PROFILE_DIR", "profiles"),
+                   start=bool(frames))
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def on_input(self, scene, events, keys):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == PROFILE_KEY:
+                if self.active:
+                    self.finish()
+                else:
+                    self.pending_start = True
+        if self.pending_start:
+            self.pending_start = False
+            self.begin(scene)
+        if self.active:
+            self.profile.enable()
+
+    def after_present(self, scene):
+        if not self.active:
+            return
+        self.profile.disable()
+        self.captured += 1
+        if self.captured >= self.frames:
+            self.finish()
+
+    def begin(self, scene):
+        self.profile = cProfile.Profile()
+        self.game = scene.caption
+        self.captured = 0
+        self.started = time.perf_counter()
+        print(f"Profiling {self.frames} frames of {self.game}...")
+
+    def finish(self):
+        profile, self.profile = self.profile, None
+        profile.disable()
+        elapsed = time.perf_counter() - self.started
+        if not self.captured:
+            return
+        name = re.sub(r"[^A-Za-z0-9]+", "-", self.game).strip("-").lower()
+        base = os.path.join(self.output_dir,
+                            f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        stats = pstats.Stats(profile)
+        stats.dump_stats(base + ".prof")
+        with open(base + ".collapsed", "w") as f:
+            for stack, seconds in sorted(collapsed_stacks(stats.stats).items()):
+                f.write(f"{stack} {max(1, round(seconds * 1e6))}\n")
+        with open(base + ".txt", "w") as f:
+            f.write(self.summary(stats, elapsed))
+        print(f"Wrote {self.captured} frame profile of {self.game} to {base}.*")
+
+    def summary(self, stats, elapsed):
+        profiled = sum(entry[2] for entry in stats.stats.values())
+        stream = io.StringIO()
+        stream.write(
+            f"{self.game}: {self.captured} frames in {elapsed:.2f} s, "
+            f"{1000 * profiled / self.captured:.2f} ms profiled per frame\n")
+        stats.stream = stream
+        for order in ("tottime", "cumulative"):
+            stats.sort_stats(order).print_stats(self.top)
+        return stream.getvalue()
+
+    def close(self):
+        if self.active:
+            self.finish()
@@ -0,0 +1,34 @@
+# Optional rendering work that can be scaled back on slow machines. Every
+# game reads the shared `current` settings while drawing; governor.py moves
+# them between levels to hold the frame rate, or GAME_QUALITY pins a level.
+# Levels, from cheapest to best:
+#   (name, smooth window scaling, antialiased text, share of particles)
+LEVELS = [
+    ("low", False, False, 0.25),
+    ("reduced", False, True, 0.5),
+    ("medium", True, True, 0.5),
+    ("high", True, True, 1.0),
+]
+LEVEL_NAMES = [level[0] for level in LEVELS]
+
+
+class Quality:
+    def __init__(self, level=len(LEVELS) - 1):
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.name, self.smooth_scaling, self.antialias, self.particles = LEVELS[level]
+
+    def set_named(self, name):
+        try:
+            self.set_level(LEVEL_NAMES.index(name))
+        except ValueError:
+            raise ValueError(f"Unknown quality level: {name}") from None
+
+    @property
+    def best(self):
+        return self.level == len(LEVELS) - 1
+
+
+current = Quality()
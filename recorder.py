@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+from scenes import FrameObserver
+
+# Gameplay capture. Frames are copied into pooled surfaces just before they
+# are presented and handed to a writer thread through a bounded queue; the
+# game loop never waits on encoding or disk I/O. When the queue is full the
+# drop policy decides which frame is lost:
+#   "newest" - skip the frame being captured
+#   "oldest" - evict the oldest queued frame to make room
+FORMATS = ("raw", "png")
+DROP_POLICIES = ("newest", "oldest")
+
+
+class Recorder(FrameObserver):
+    def __init__(self, path, fmt="raw", max_queue=60, drop="newest", fps=60):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown recording format: {fmt}")
+        if drop not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop}")
+        self.path = path
+        self.fmt = fmt
+        self.max_queue = max_queue
+        self.drop = drop
+        self.fps = fps
+
+        self.queue = deque()
+        self.free = []  # surfaces ready to be reused for captures
+        self.cond = threading.Condition()
+        self.closing = False
+        self.size = None
+        self.stream = None
+
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.capture_time = 0.0
+
+        os.makedirs(path, exist_ok=True)
+        self.thread = threading.Thread(
+            target=self.writer, name="recorder", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.environ["GAME_RECORD"],
+            fmt=os.environ.get("GAME_RECORD_FORMAT", "raw"),
+            max_queue=int(os.environ.get("GAME_RECORD_QUEUE", "60")),
+            drop=os.environ.get("GAME_RECORD_DROP", "newest"),
+        )
+
+    def before_present(self, screen):
+        start = time.perf_counter()
+        size = screen.get_size()
+        with self.cond:
+            if self.size is None:
+                self.size = size
+            elif size != self.size:
+                # The raw stream has a fixed frame size
+                self.dropped += 1
+                return
+            if len(self.queue) >= self.max_queue:
+                if self.drop == "newest":
+                    self.dropped += 1
+                    return
+                frame = self.queue.popleft()[1]
+                self.dropped += 1
+            elif self.free:
+                frame = self.free.pop()
+            else:
+                frame = None
+        if frame is None:
+            frame = screen.copy()
+        else:
+            frame.blit(screen, (0, 0))
+        with self.cond:
+            self.queue.append((self.captured, frame))
+            self.captured += 1
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.cond.notify()
+        self.capture_time += time.perf_counter() - start
+
+    def writer(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.closing:
+                    self.cond.wait()
+                if not self.queue:
+                    break
+                index, frame = self.queue.popleft()
+            try:
+                self.write_frame(index, frame)
+            except (OSError, pygame.error) as e:
+                print(f"Error writing frame {index}: {e}")
+            with self.cond:
+                self.written += 1
+                self.free.append(frame)
+
+    def write_frame(self, index, frame):
+        if self.fmt == "png":
+            pygame.image.save(
+                frame, os.path.join(self.path, f"frame_{index:06d}.png"))
+            return
+        if self.stream is None:
+            self.stream = open(os.path.join(self.path, "frames.rgb"), "wb")
+            width, height = frame.get_size()
+            # Enough to replay with e.g.
+            # ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r FPS -i frames.rgb
+            with open(os.path.join(self.path, "frames.json"), "w") as f:
+                json.dump({"width": width, "height": height,
+                           "pix_fmt": "rgb24", "fps": self.fps}, f)
+        self.stream.write(pygame.image.tobytes(frame, "RGB"))
+
+    def stats(self):
+        with self.cond:
+            return {
+                "captured": self.captured,
+                "written": self.written,
+                "dropped": self.dropped,
+                "queue_depth": len(self.queue),
+                "max_queue_depth": self.max_depth,
+                "avg_capture_ms": (
+                    1000 * self.capture_time / self.captured
+                    if self.captured else 0.0),
+            }
+
+    def close(self):
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.thread.join()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        stats = self.stats()
+        print(f"Recorded {stats['written']} frames to {self.path} "
+              f"({stats['dropped']} dropped, max queue depth "
+              f"{stats['max_queue_depth']}/{self.max_queue}, "
+              f"{stats['avg_capture_ms']:.2f} ms per capture)")
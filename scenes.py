@@ -0,0 +1,202 @@
+import os
+import traceback
+from collections import deque
+
+import pygame
+
+from viewport import ScaledDisplay
+
+SOUND_QUEUE_SIZE = 32  # effects waiting for the end of the frame
+
+
+class Scene:
+    # A game or menu screen driven by SceneManager. Scenes keep their fonts,
+    # images and state between visits, so switching back is instant.
+    caption = "Game Menu"
+    fps = 30
+
+    def __init__(self):
+        self.manager = None
+        self.finished = False  # True once the scene should restart on entry
+
+    def on_enter(self):
+        pygame.display.set_caption(self.caption)
+
+    def on_exit(self):
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, keys):
+        pass
+
+    def draw(self, screen):
+        pass
+
+    def latency_probe(self):
+        # Snapshot of the state player input changes, for latency.py
+        return None
+
+    def play_sound(self, name):
+        # Queued for sound.py to play after the frame; silent without a manager
+        if self.manager is not None:
+            self.manager.sound_queue.append(name)
+
+    def leave(self):
+        if self.manager is not None and self.manager.top is self:
+            self.manager.pop()
+
+
+class HeldKeys:
+    # Stands in for pygame.key.get_pressed() with a fixed set of held keys
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+NO_KEYS = HeldKeys()
+
+
+class FrameObserver:
+    # Instrumentation hooked into the SceneManager frame loop
+    def on_input(self, scene, events, keys):
+        pass
+
+    def before_present(self, screen):
+        pass
+
+    def after_present(self, scene):
+        pass
+
+    def close(self):
+        pass
+
+
+def default_observers():
+    # Optional instrumentation switched on through environment variables
+    observers = []
+    if os.environ.get("GAME_RECORD"):
+        from recorder import Recorder
+        observers.append(Recorder.from_env())
+    if os.environ.get("GAME_LATENCY"):
+        from latency import LatencyTracker
+        observers.append(LatencyTracker.from_env())
+    if os.environ.get("GAME_ALLOC"):
+        from allocprof import AllocationProfiler
+        observers.append(AllocationProfiler.from_env())
+    # Idle until its hotkey is pressed, so it is on unless GAME_PROFILE_FRAMES=0
+    if os.environ.get("GAME_PROFILE_FRAMES") != "0":
+        from profiling import FrameProfiler
+        observers.append(FrameProfiler.from_env())
+    # GAME_QUALITY=low|reduced|medium|high pins the quality level;
+    # otherwise the governor adapts it to the frame rate
+    quality_level = os.environ.get("GAME_QUALITY", "auto")
+    if quality_level == "auto":
+        from governor import QualityGovernor
+        observers.append(QualityGovernor.from_env())
+    else:
+        import quality
+        quality.current.set_named(quality_level)
+    # GAME_SOUND=0 mutes the games
+    if os.environ.get("GAME_SOUND") != "0":
+        from sound import SoundBoard
+        board = SoundBoard.shared()
+        if board.enabled:
+            observers.append(board)
+    return observers
+
+
+class SceneManager:
+    def __init__(self, screen, observers=None):
+        # `screen` is the window surface, or a ScaledDisplay whose logical
+        # surface the scenes draw to
+        if isinstance(screen, ScaledDisplay):
+            self.display = screen
+            self.screen = screen.surface
+        else:
+            self.display = None
+            self.screen = screen
+        self.clock = pygame.time.Clock()
+        self.stack = []
+        self.sound_queue = deque(maxlen=SOUND_QUEUE_SIZE)
+        self.observers = default_observers() if observers is None else observers
+
+    @property
+    def top(self):
+        return self.stack[-1] if self.stack else None
+
+    def push(self, scene):
+        if self.stack:
+            self.stack[-1].on_exit()
+        scene.manager = self
+        self.stack.append(scene)
+        scene.on_enter()
+
+    def pop(self):
+        scene = self.stack.pop()
+        scene.on_exit()
+        if self.stack:
+            self.stack[-1].on_enter()
+        return scene
+
+    def mouse_pos(self):
+        # Mouse position in the coordinates scenes draw in
+        if self.display is not None:
+            return self.display.mouse_pos()
+        return pygame.mouse.get_pos()
+
+    def stop(self):
+        while self.stack:
+            self.pop()
+
+    def run(self, scene=None):
+        if scene is not None:
+            self.push(scene)
+        try:
+            while self.stack:
+                scene = self.stack[-1]
+                try:
+                    self.run_frame()
+                except Exception as e:
+                    if len(self.stack) < 2 or scene is not self.stack[-1]:
+                        raise
+                    print(f"Error running {scene.caption}: {e}")
+                    traceback.print_exc()
+                    scene.finished = True
+                    self.pop()
+        finally:
+            for observer in self.observers:
+                observer.close()
+
+    def run_frame(self):
+        events = pygame.event.get()
+        keys = pygame.key.get_pressed()
+        if self.display is not None:
+            for event in events:
+                self.display.handle_event(event)
+        for observer in self.observers:
+            observer.on_input(self.stack[-1], events, keys)
+        for event in events:
+            if not self.stack:
+                return
+            self.stack[-1].handle_event(event)
+        if not self.stack:
+            return
+        scene = self.stack[-1]
+        scene.update(keys)
+        if not self.stack:
+            return
+        scene = self.stack[-1]
+        scene.draw(self.screen)
+        for observer in self.observers:
+            observer.before_present(self.screen)
+        if self.display is not None:
+            self.display.present()
+        else:
+            pygame.display.flip()
+        for observer in self.observers:
+            observer.after_present(scene)
+        self.clock.tick(scene.fps)
@@ -1,5 +1,13 @@
 import pygame
 import os
+import sys
+
+import atlas
+import pixelformat
+import quality
+import sound
+from scenes import Scene, SceneManager
+from viewport import ScaledDisplay
 
 # --- Game Constants ---
 WIDTH, HEIGHT = 700, 500
@@ -16,101 +24,181 @@ YELLOW = (255, 255, 0)
 
 BORDER = pygame.Rect(WIDTH // 2 - 5, 0, 10, HEIGHT)
 
-YELLOW_HIT = pygame.USEREVENT + 1
-RED_HIT = pygame.USEREVENT + 2
-
-
-def run_shooter(screen):
-    # Load images
-    yellow_ship = pygame.transform.rotate(
-        pygame.transform.scale(pygame.image.load(
-            "images/Shooter/spaceship_yellow.png"), (SPACESHIP_WIDTH, SPACESHIP_HEIGHT)), 90
-    )
-    red_ship = pygame.transform.rotate(
-        pygame.transform.scale(pygame.image.load(
-            "images/Shooter/spaceship_red.png"), (SPACESHIP_WIDTH, SPACESHIP_HEIGHT)), 270
-    )
-    space_bg = pygame.transform.scale(
-        pygame.image.load("images/Shooter/space.png"), (WIDTH, HEIGHT))
-
-    # Default font
-    font = pygame.font.Font(None, 36)
-    big_font = pygame.font.Font(None, 80)
-
-    red = pygame.Rect(500, 300, SPACESHIP_WIDTH, SPACESHIP_HEIGHT)
-    yellow = pygame.Rect(100, 300, SPACESHIP_WIDTH, SPACESHIP_HEIGHT)
-
-    red_bullets = []
-    yellow_bullets = []
-
-    red_health = 10
-    yellow_health = 10
-
-    clock = pygame.time.Clock()
-    run = True
-    while run:
-        clock.tick(FPS)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LCTRL and len(yellow_bullets) < MAX_BULLETS:
-                    bullet = pygame.Rect(
-                        yellow.x + yellow.width,
-                        yellow.y + yellow.height // 2 - 2,
-                        10,
-                        5,
-                    )
-                    yellow_bullets.append(bullet)
-
-                if event.key == pygame.K_RCTRL and len(red_bullets) < MAX_BULLETS:
-                    bullet = pygame.Rect(
-                        red.x, red.y + red.height // 2 - 2, 10, 5)
-                    red_bullets.append(bullet)
-
-            if event.type == RED_HIT:
-                red_health -= 1
-
-            if event.type == YELLOW_HIT:
-                yellow_health -= 1
-
-        winner_text = ""
-        if red_health <= 0:
-            winner_text = "Yellow Wins!"
-        if yellow_health <= 0:
-            winner_text = "Red Wins!"
-        if winner_text != "":
-            draw_winner(screen, winner_text, big_font)
-            pygame.time.wait(2000)
+# Sprites packed by atlas.py, as (path, in-game size, smooth scaling)
+SPRITES = [
+    ("images/Shooter/spaceship_yellow.png",
+     (SPACESHIP_WIDTH, SPACESHIP_HEIGHT), False),
+    ("images/Shooter/spaceship_red.png",
+     (SPACESHIP_WIDTH, SPACESHIP_HEIGHT), False),
+    ("images/Shooter/space.png", (WIDTH, HEIGHT), False),
+]
+
+
+def load_and_scale_image(path, size):
+    img = atlas.lookup(path, size)
+    if img is None:
+        img = pixelformat.scale_image(pygame.image.load(path), size, smooth=False)
+    return pixelformat.optimize(img)
+
+
+class ShooterGame(Scene):
+    caption = "2-Player Shooter"
+    fps = FPS
+
+    def __init__(self, bot=None):
+        super().__init__()
+        # A bot (see shooter_bot.py) drives the red ship instead of the arrows
+        self.bot = bot
+        if bot is not None:
+            self.caption = "1-Player Shooter"
+        self.assets_loaded = False
+        self.reset()
+
+    def load_assets(self):
+        if self.assets_loaded:
+            return
+        # Load images
+        self.yellow_ship = pixelformat.optimize(pygame.transform.rotate(
+            load_and_scale_image(
+                "images/Shooter/spaceship_yellow.png", (SPACESHIP_WIDTH, SPACESHIP_HEIGHT)), 90
+        ))
+        self.red_ship = pixelformat.optimize(pygame.transform.rotate(
+            load_and_scale_image(
+                "images/Shooter/spaceship_red.png", (SPACESHIP_WIDTH, SPACESHIP_HEIGHT)), 270
+        ))
+        self.space_bg = load_and_scale_image("images/Shooter/space.png", (WIDTH, HEIGHT))
+
+        # Default font
+        self.font = pygame.font.Font(None, 36)
+        self.big_font = pygame.font.Font(None, 80)
+        self.assets_loaded = True
+
+    def reset(self):
+        self.red = pygame.Rect(500, 300, SPACESHIP_WIDTH, SPACESHIP_HEIGHT)
+        self.yellow = pygame.Rect(100, 300, SPACESHIP_WIDTH, SPACESHIP_HEIGHT)
+
+        self.red_bullets = []
+        self.yellow_bullets = []
+
+        self.red_health = 10
+        self.yellow_health = 10
+
+        self.winner_text = ""
+        self.winner_frames = 0
+        self.finished = False
+        if self.bot is not None:
+            self.bot.reset()
+
+    @property
+    def game_over(self):
+        return self.winner_text != ""
+
+    def on_enter(self):
+        super().on_enter()
+        self.load_assets()
+
+    def yellow_fire(self):
+        if len(self.yellow_bullets) < MAX_BULLETS:
+            yellow = self.yellow
+            bullet = pygame.Rect(
+                yellow.x + yellow.width,
+                yellow.y + yellow.height // 2 - 2,
+                10,
+                5,
+            )
+            self.yellow_bullets.append(bullet)
+            self.play_sound("shoot")
+
+    def red_fire(self):
+        if len(self.red_bullets) < MAX_BULLETS:
+            red = self.red
+            bullet = pygame.Rect(
+                red.x, red.y + red.height // 2 - 2, 10, 5)
+            self.red_bullets.append(bullet)
+            self.play_sound("shoot")
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            # Pause back to the menu; once someone has won this ends the game
+            self.finished = self.game_over
+            self.leave()
             return
 
-        keys_pressed = pygame.key.get_pressed()
-        yellow_handle_movement(keys_pressed, yellow)
-        red_handle_movement(keys_pressed, red)
-
-        handle_bullets(yellow_bullets, red_bullets, yellow, red)
+        if event.type == pygame.KEYDOWN and not self.game_over:
+            if event.key == pygame.K_LCTRL:
+                self.yellow_fire()
+            if event.key == pygame.K_RCTRL and self.bot is None:
+                self.red_fire()
+
+    def update(self, keys_pressed):
+        if self.game_over:
+            # Show the winner for two seconds, then go back to the menu
+            self.winner_frames -= 1
+            if self.winner_frames <= 0:
+                self.finished = True
+                self.leave()
+            return
 
+        yellow_handle_movement(keys_pressed, self.yellow)
+        if self.bot is None:
+            red_handle_movement(keys_pressed, self.red)
+        else:
+            red_keys, fire = self.bot.act(self)
+            red_handle_movement(red_keys, self.red)
+            if fire:
+                self.red_fire()
+
+        red_hits, yellow_hits = handle_bullets(
+            self.yellow_bullets, self.red_bullets, self.yellow, self.red)
+        self.red_health -= red_hits
+        self.yellow_health -= yellow_hits
+        if red_hits or yellow_hits:
+            self.play_sound("hit")
+
+        if self.red_health <= 0:
+            self.winner_text = "Yellow Wins!"
+        if self.yellow_health <= 0:
+            self.winner_text = "Red Wins!"
+        if self.winner_text != "":
+            self.winner_frames = 2 * FPS
+            # Against the bot, red winning means the player lost
+            if self.bot is not None and self.yellow_health <= 0:
+                self.play_sound("lose")
+            else:
+                self.play_sound("win")
+
+    def latency_probe(self):
+        return (self.yellow.x, self.yellow.y, self.red.x, self.red.y,
+                len(self.yellow_bullets), len(self.red_bullets))
+
+    def draw(self, screen):
         # Draw everything
-        screen.blit(space_bg, (0, 0))
+        screen.blit(self.space_bg, (0, 0))
         pygame.draw.rect(screen, BLACK, BORDER)
 
-        red_health_text = font.render(f"Health: {red_health}", True, WHITE)
-        yellow_health_text = font.render(
-            f"Health: {yellow_health}", True, WHITE)
+        antialias = quality.current.antialias
+        red_health_text = self.font.render(f"Health: {self.red_health}", antialias, WHITE)
+        yellow_health_text = self.font.render(
+            f"Health: {self.yellow_health}", antialias, WHITE)
         screen.blit(red_health_text,
                     (WIDTH - red_health_text.get_width() - 10, 10))
         screen.blit(yellow_health_text, (10, 10))
 
-        screen.blit(yellow_ship, (yellow.x, yellow.y))
-        screen.blit(red_ship, (red.x, red.y))
+        screen.blit(self.yellow_ship, (self.yellow.x, self.yellow.y))
+        screen.blit(self.red_ship, (self.red.x, self.red.y))
 
-        for bullet in red_bullets:
+        for bullet in self.red_bullets:
             pygame.draw.rect(screen, RED, bullet)
-        for bullet in yellow_bullets:
+        for bullet in self.yellow_bullets:
             pygame.draw.rect(screen, YELLOW, bullet)
 
-        pygame.display.update()
+        if self.winner_text != "":
+            draw_winner(screen, self.winner_text, self.big_font)
+
+
+def run_shooter(screen, bot=None):
+    SceneManager(screen).run(ShooterGame(bot))
 
 
 def yellow_handle_movement(keys_pressed, yellow):
@@ -136,10 +224,12 @@ def red_handle_movement(keys_pressed, red):
 
 
 def handle_bullets(yellow_bullets, red_bullets, yellow, red):
+    # Returns (hits on red, hits on yellow) for this frame
+    red_hits = yellow_hits = 0
     for bullet in yellow_bullets[:]:
         bullet.x += BULLET_VEL
         if red.colliderect(bullet):
-            pygame.event.post(pygame.event.Event(RED_HIT))
+            red_hits += 1
             yellow_bullets.remove(bullet)
         elif bullet.x > WIDTH:
             yellow_bullets.remove(bullet)
@@ -147,14 +237,15 @@ def handle_bullets(yellow_bullets, red_bullets, yellow, red):
     for bullet in red_bullets[:]:
         bullet.x -= BULLET_VEL
         if yellow.colliderect(bullet):
-            pygame.event.post(pygame.event.Event(YELLOW_HIT))
+            yellow_hits += 1
             red_bullets.remove(bullet)
         elif bullet.x < 0:
             red_bullets.remove(bullet)
+    return red_hits, yellow_hits
 
 
 def draw_winner(screen, text, font):
-    draw_text = font.render(text, True, WHITE)
+    draw_text = font.render(text, quality.current.antialias, WHITE)
     screen.blit(
         draw_text,
         (
@@ -162,11 +253,15 @@ def draw_winner(screen, text, font):
             HEIGHT / 2 - draw_text.get_height() / 2,
         ),
     )
-    pygame.display.update()
 
 
 # For standalone testing:
 if __name__ == "__main__":
+    sound.pre_init()
     pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    run_shooter(screen)
+    screen = ScaledDisplay.from_env((WIDTH, HEIGHT))
+    if "--bot" in sys.argv:
+        from shooter_bot import ShooterBot
+        run_shooter(screen, ShooterBot())
+    else:
+        run_shooter(screen)
@@ -0,0 +1,153 @@
+import time
+
+import pygame
+
+from scenes import HeldKeys
+from shooter import (BORDER, BULLET_VEL, HEIGHT, MAX_BULLETS,
+                     SPACESHIP_HEIGHT, SPACESHIP_WIDTH, VEL, WIDTH)
+
+# Computer player for the red ship. Each frame it predicts where the yellow
+# bullets will be, tries every way of holding the arrow keys for a growing
+# lookahead (iterative deepening) and keeps the best move from the deepest
+# lookahead it finished within its CPU budget. If a frame runs over budget
+# the next one starts with a shorter maximum lookahead.
+BUDGET_MS = 1.5
+HORIZONS = [4, 8, 16, 24, 32, 48]  # lookahead depths in frames
+HIT_PENALTY = 10000
+PREFERRED_X = WIDTH * 3 // 4
+
+BULLET_WIDTH, BULLET_HEIGHT = 10, 5
+
+# (dx, dy, keys) for every combination of arrow keys
+MOVES = []
+for dx, x_key in ((-1, pygame.K_LEFT), (0, None), (1, pygame.K_RIGHT)):
+    for dy, y_key in ((-1, pygame.K_UP), (0, None), (1, pygame.K_DOWN)):
+        keys = [key for key in (x_key, y_key) if key is not None]
+        MOVES.append((dx, dy, HeldKeys(keys)))
+
+
+def step_ship(x, y, dx, dy):
+    # Same bounds as shooter.red_handle_movement()
+    if dx < 0 and x - VEL > BORDER.x + BORDER.width:
+        x -= VEL
+    if dx > 0 and x + VEL + SPACESHIP_WIDTH < WIDTH:
+        x += VEL
+    if dy < 0 and y - VEL > 0:
+        y -= VEL
+    if dy > 0 and y + VEL + SPACESHIP_HEIGHT < HEIGHT - 15:
+        y += VEL
+    return x, y
+
+
+def first_hit(x, y, dx, dy, bullets, horizon):
+    # Frame at which a yellow bullet hits the ship holding (dx, dy), or None
+    for t in range(1, horizon + 1):
+        x, y = step_ship(x, y, dx, dy)
+        for bx, by in bullets:
+            bx += BULLET_VEL * t
+            if (bx < x + SPACESHIP_WIDTH and bx + BULLET_WIDTH > x
+                    and by < y + SPACESHIP_HEIGHT and by + BULLET_HEIGHT > y):
+                return t
+    return None
+
+
+class ShooterBot:
+    def __init__(self, budget_ms=BUDGET_MS):
+        self.budget = budget_ms / 1000
+        self.max_level = len(HORIZONS) - 1
+        self.reset()
+        # Stats
+        self.frames = 0
+        self.overruns = 0
+        self.last_ms = 0.0
+        self.worst_ms = 0.0
+
+    def reset(self):
+        # Forgets the last round's tracking; the CPU budget state carries over
+        self.last_yellow_y = None
+        self.yellow_vy = 0
+        self.move = MOVES[4]  # no keys held
+
+    def act(self, game):
+        # Returns (keys for red_handle_movement, whether to fire)
+        start = time.perf_counter()
+        deadline = start + self.budget
+        red, yellow = game.red, game.yellow
+
+        if self.last_yellow_y is not None:
+            self.yellow_vy = yellow.y - self.last_yellow_y
+        self.last_yellow_y = yellow.y
+
+        # Only bullets still heading for us matter
+        bullets = [(b.x, b.y) for b in game.yellow_bullets if b.x < red.right]
+        target_y = self.predict_yellow_y(yellow, red.x - yellow.right)
+
+        best = self.move
+        level = 0
+        while level <= self.max_level:
+            result = self.search(red.x, red.y, bullets, target_y,
+                                 HORIZONS[level], deadline)
+            if result is None:
+                break  # Out of time; keep the deepest finished search
+            best = result
+            level += 1
+
+        self.move = best
+        fire = (len(game.red_bullets) < MAX_BULLETS
+                and self.on_target(red, yellow))
+
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.last_ms = elapsed * 1000
+        self.worst_ms = max(self.worst_ms, self.last_ms)
+        if elapsed > self.budget:
+            self.overruns += 1
+            self.max_level = max(0, self.max_level - 1)
+        elif elapsed < self.budget / 2 and level > self.max_level:
+            self.max_level = min(len(HORIZONS) - 1, self.max_level + 1)
+        return best[2], fire
+
+    def predict_yellow_y(self, yellow, distance):
+        frames = max(0, distance) / BULLET_VEL
+        y = yellow.centery + self.yellow_vy * frames
+        return min(max(y, SPACESHIP_HEIGHT // 2),
+                   HEIGHT - 15 - SPACESHIP_HEIGHT // 2)
+
+    def on_target(self, red, yellow):
+        # Fire when our bullet would arrive inside yellow's predicted span
+        bullet_y = red.y + red.height // 2 - 2
+        frames = max(0, red.x - yellow.right) / BULLET_VEL
+        predicted_top = yellow.y + self.yellow_vy * frames
+        return (predicted_top - BULLET_HEIGHT < bullet_y
+                < predicted_top + yellow.height)
+
+    def search(self, x, y, bullets, target_y, horizon, deadline):
+        best = None
+        best_score = None
+        for move in MOVES:
+            if time.perf_counter() > deadline:
+                return None
+            dx, dy, _ = move
+            hit = first_hit(x, y, dx, dy, bullets, horizon)
+            score = 0.0
+            if hit is not None:
+                score -= HIT_PENALTY * (horizon + 1 - hit)
+            # Line up with yellow and keep room to dodge
+            end_x, end_y = x, y
+            for _ in range(min(horizon, 8)):
+                end_x, end_y = step_ship(end_x, end_y, dx, dy)
+            score -= abs(end_y + SPACESHIP_HEIGHT / 2 - target_y)
+            score -= 0.1 * abs(end_x - PREFERRED_X)
+            if best_score is None or score > best_score:
+                best, best_score = move, score
+        return best
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "last_ms": self.last_ms,
+            "worst_ms": self.worst_ms,
+            "max_horizon": HORIZONS[self.max_level],
+            "budget_ms": self.budget * 1000,
+        }
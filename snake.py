@@ -1,6 +1,14 @@
 import pygame
 import random
 import os
+from collections import deque
+
+import atlas
+import pixelformat
+import quality
+import sound
+from scenes import Scene, SceneManager
+from viewport import ScaledDisplay
 
 # Constants
 WIDTH, HEIGHT = 700, 500
@@ -12,16 +20,30 @@ BOX_HEIGHT = GRID_ROWS * (CELL_SIZE)
 BOX_X = (WIDTH - BOX_WIDTH) // 2
 BOX_Y = 80  # Leave space for title above
 
+FPS = 60  # Input polling and rendering rate
+MOVE_RATE = 10  # Grid steps per second
+MAX_QUEUED_TURNS = 3
+
 # Directions
 UP = (0, -1)
 DOWN = (0, 1)
 LEFT = (-1, 0)
 RIGHT = (1, 0)
 
+# Sprites packed by atlas.py, as (path, in-game size)
+SPRITES = [
+    ("images/snake/snake_head.png", (CELL_SIZE, CELL_SIZE)),
+    ("images/snake/snake_body.png", (CELL_SIZE, CELL_SIZE)),
+    ("images/snake/food.png", (CELL_SIZE, CELL_SIZE)),
+    ("images/snake/background.png", (WIDTH, HEIGHT)),
+]
+
 
 def load_and_scale_image(path, size):
-    img = pygame.image.load(path).convert_alpha()
-    return pygame.transform.smoothscale(img, size)
+    img = atlas.lookup(path, size)
+    if img is None:
+        img = pixelformat.scale_image(pygame.image.load(path), size)
+    return pixelformat.optimize(img)
 
 
 class Snake:
@@ -36,13 +58,18 @@ class Snake:
         ]
 
         self.direction = random.choice([UP, DOWN, LEFT, RIGHT])
+        self.turns = deque()  # Turns waiting for their move step
         self.grow = False
 
-    def move(self):
+    def next_direction(self):
+        return self.turns[0] if self.turns else self.direction
+
+    def next_head(self):
         head_x, head_y = self.positions[0]
-        dir_x, dir_y = self.direction
-        new_head = (head_x + dir_x, head_y + dir_y)
+        dir_x, dir_y = self.next_direction()
+        return (head_x + dir_x, head_y + dir_y)
 
+    def can_move_to(self, new_head):
         # Check wall collision (inside box)
         if (
             new_head[0] < 0
@@ -55,6 +82,15 @@ class Snake:
         # Check self collision
         if new_head in self.positions[1:]:
             return False
+        return True
+
+    def move(self):
+        # Each move step consumes at most one queued turn
+        new_head = self.next_head()
+        if self.turns:
+            self.direction = self.turns.popleft()
+        if not self.can_move_to(new_head):
+            return False
 
         self.positions.insert(0, new_head)
         if not self.grow:
@@ -64,10 +100,17 @@ class Snake:
         return True
 
     def change_direction(self, new_direction):
+        # Turns are checked against the last queued direction, so two quick
+        # turns inside one move step both happen, on consecutive steps
+        last = self.turns[-1] if self.turns else self.direction
         # Prevent reversing into itself
-        opposite = (-self.direction[0], -self.direction[1])
-        if new_direction != opposite:
-            self.direction = new_direction
+        opposite = (-last[0], -last[1])
+        if (
+            new_direction != opposite
+            and new_direction != last
+            and len(self.turns) < MAX_QUEUED_TURNS
+        ):
+            self.turns.append(new_direction)
 
     def eat(self):
         self.grow = True
@@ -90,133 +133,175 @@ class Food:
         self.position = self.random_position(snake_positions)
 
 
-def run_snake(screen):
-    pygame.display.set_caption("Snake Game")
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont(None, 36)
-    title_font = pygame.font.SysFont(None, 54)
-
-    # Load images AFTER display is initialized
-    snake_head_img_base = load_and_scale_image(
-        'images/snake/snake_head.png', (CELL_SIZE, CELL_SIZE))
-    snake_body_img = load_and_scale_image(
-        "images/snake/snake_body.png", (CELL_SIZE, CELL_SIZE))
-    food_img = load_and_scale_image(
-        "images/snake/food.png", (CELL_SIZE, CELL_SIZE))
-    bg_img = load_and_scale_image(
-        "images/snake/background.png", (WIDTH, HEIGHT))
-
-    def get_head_image(direction):
-        if direction == DOWN:
-            return snake_head_img_base
-        elif direction == UP:
-            return pygame.transform.rotate(snake_head_img_base, 180)
-        elif direction == RIGHT:
-            return pygame.transform.rotate(snake_head_img_base, 90)
-        elif direction == LEFT:
-            return pygame.transform.rotate(snake_head_img_base, -90)
-        return snake_head_img_base
-
-    snake = Snake()
-    food = Food(snake.positions)
-    score = 0
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-                elif event.key == pygame.K_UP:
-                    snake.change_direction(UP)
-                elif event.key == pygame.K_DOWN:
-                    snake.change_direction(DOWN)
-                elif event.key == pygame.K_LEFT:
-                    snake.change_direction(LEFT)
-                elif event.key == pygame.K_RIGHT:
-                    snake.change_direction(RIGHT)
-
-        if not snake.move():
-            running = False  # Snake collided with itself or wall
-
-        if snake.positions[0] == food.position:
-            snake.eat()
-            score += 1
-            food.respawn(snake.positions)
-
+class SnakeGame(Scene):
+    caption = "Snake Game"
+    fps = FPS
+
+    def __init__(self, move_rate=MOVE_RATE):
+        super().__init__()
+        self.move_rate = move_rate
+        self.assets_loaded = False
+        self.reset()
+
+    def load_assets(self):
+        if self.assets_loaded:
+            return
+        self.font = pygame.font.SysFont(None, 36)
+        self.title_font = pygame.font.SysFont(None, 54)
+
+        # Load images AFTER display is initialized
+        snake_head_img_base = load_and_scale_image(
+            'images/snake/snake_head.png', (CELL_SIZE, CELL_SIZE))
+        self.snake_body_img = load_and_scale_image(
+            "images/snake/snake_body.png", (CELL_SIZE, CELL_SIZE))
+        self.food_img = load_and_scale_image(
+            "images/snake/food.png", (CELL_SIZE, CELL_SIZE))
+        self.bg_img = load_and_scale_image(
+            "images/snake/background.png", (WIDTH, HEIGHT))
+
+        # Head images for each direction, rotated once up front
+        self.head_imgs = {
+            DOWN: snake_head_img_base,
+            UP: pixelformat.optimize(
+                pygame.transform.rotate(snake_head_img_base, 180)),
+            RIGHT: pixelformat.optimize(
+                pygame.transform.rotate(snake_head_img_base, 90)),
+            LEFT: pixelformat.optimize(
+                pygame.transform.rotate(snake_head_img_base, -90)),
+        }
+        self.title_text = self.title_font.render("Snake Game", True, (0, 255, 0))
+        self.assets_loaded = True
+
+    def reset(self):
+        self.snake = Snake()
+        self.food = Food(self.snake.positions)
+        self.score = 0
+        # Counts up by move_rate every frame; a move step happens each time
+        # it reaches fps, so move_clock / fps is the progress to the next one
+        self.move_clock = 0
+        self.game_over = False
+        self.finished = False
+
+    def on_enter(self):
+        super().on_enter()
+        self.load_assets()
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.finished = self.game_over
+            self.leave()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                # ESC pauses back to the menu; after game over it ends the game
+                self.finished = self.game_over
+                self.leave()
+            elif self.game_over:
+                return
+            elif event.key == pygame.K_UP:
+                self.snake.change_direction(UP)
+            elif event.key == pygame.K_DOWN:
+                self.snake.change_direction(DOWN)
+            elif event.key == pygame.K_LEFT:
+                self.snake.change_direction(LEFT)
+            elif event.key == pygame.K_RIGHT:
+                self.snake.change_direction(RIGHT)
+
+    def update(self, keys):
+        # Runs at FPS; the snake itself advances move_rate times a second
+        if self.game_over:
+            return
+        self.move_clock += self.move_rate
+        while self.move_clock >= self.fps and not self.game_over:
+            self.move_clock -= self.fps
+            self.step()
+
+    def step(self):
+        if not self.snake.move():
+            self.game_over = True  # Snake collided with itself or wall
+            self.play_sound("lose")
+            return
+
+        if self.snake.positions[0] == self.food.position:
+            self.snake.eat()
+            self.play_sound("eat")
+            self.score += 1
+            self.food.respawn(self.snake.positions)
+
+    def latency_probe(self):
+        # The head is drawn facing the next direction, so a turn shows at once
+        return self.snake.next_direction(), len(self.snake.turns)
+
+    def draw_frame(self, screen):
         # Draw background
-        screen.blit(bg_img, (0, 0))
+        screen.blit(self.bg_img, (0, 0))
 
         # Draw bordered box
         pygame.draw.rect(screen, (0, 255, 0),
                          (BOX_X-3, BOX_Y-3, BOX_WIDTH+6, BOX_HEIGHT+6), 3)
 
         # Draw game name above the box
-        title_text = title_font.render("Snake Game", True, (0, 255, 0))
-        screen.blit(title_text, (WIDTH // 2 -
-                    title_text.get_width() // 2, BOX_Y - 60))
-
-        # Draw snake (inside box)
-        for i, pos in enumerate(snake.positions):
-            rect = pygame.Rect(
-                BOX_X + pos[0] * CELL_SIZE, BOX_Y +
-                pos[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE
-            )
+        screen.blit(self.title_text, (WIDTH // 2 -
+                    self.title_text.get_width() // 2, BOX_Y - 60))
+
+    def draw(self, screen):
+        self.draw_frame(screen)
+        if self.game_over:
+            self.draw_game_over(screen)
+            return
+
+        # Draw snake (inside box), sliding each segment towards the cell it
+        # moves into on the next step
+        snake = self.snake
+        positions = snake.positions
+        next_head = snake.next_head()
+        t = self.move_clock / self.fps if snake.can_move_to(next_head) else 0
+        last = len(positions) - 1
+        for i, pos in enumerate(positions):
+            if i == 0:
+                target = next_head
+            elif i == last and snake.grow:
+                target = pos
+            else:
+                target = positions[i - 1]
+            x = BOX_X + int((pos[0] + (target[0] - pos[0]) * t) * CELL_SIZE)
+            y = BOX_Y + int((pos[1] + (target[1] - pos[1]) * t) * CELL_SIZE)
             if i == 0:
-                head_img = get_head_image(snake.direction)
-                screen.blit(head_img, rect)
+                screen.blit(self.head_imgs[snake.next_direction()], (x, y))
             else:
-                screen.blit(snake_body_img, rect)
+                screen.blit(self.snake_body_img, (x, y))
 
         # Draw food (inside box)
         food_rect = pygame.Rect(
-            BOX_X + food.position[0] * CELL_SIZE,
-            BOX_Y + food.position[1] * CELL_SIZE,
+            BOX_X + self.food.position[0] * CELL_SIZE,
+            BOX_Y + self.food.position[1] * CELL_SIZE,
             CELL_SIZE,
             CELL_SIZE,
         )
-        screen.blit(food_img, food_rect)
+        screen.blit(self.food_img, food_rect)
 
         # Draw score (inside box, top-left)
-        score_text = font.render(f"Score: {score}", True, (0, 255, 0))
+        score_text = self.font.render(f"Score: {self.score}", quality.current.antialias, (0, 255, 0))
         screen.blit(score_text, (BOX_X + BOX_WIDTH - 100, BOX_Y - 30))
 
-        pygame.display.flip()
-        clock.tick(10)
-
-    # Game over message
-    screen.blit(bg_img, (0, 0))
-    pygame.draw.rect(screen, (0, 255, 0),
-                     (BOX_X-3, BOX_Y-3, BOX_WIDTH+6, BOX_HEIGHT+6), 3)
-    title_text = title_font.render("Snake Game", True, (0, 255, 0))
-    screen.blit(title_text, (WIDTH // 2 -
-                title_text.get_width() // 2, BOX_Y - 60))
-
-    game_over_text = font.render(
-        "Game Over! Press ESC to return to menu.", True, (255, 0, 0))
-    screen.blit(
-        game_over_text, (WIDTH // 2 -
-                         game_over_text.get_width() // 2, HEIGHT // 2)
-    )
-
-    score_text = font.render(f"Score: {score}", True, (255, 255, 255),)
-    screen.blit(score_text, (WIDTH // 2, HEIGHT // 2-40))
-    
-    pygame.display.flip()
-
-    # Wait for ESC to return
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                waiting = False
-            elif event.type == pygame.QUIT:
-                waiting = False
+    def draw_game_over(self, screen):
+        game_over_text = self.font.render(
+            "Game Over! Press ESC to return to menu.", quality.current.antialias, (255, 0, 0))
+        screen.blit(
+            game_over_text, (WIDTH // 2 -
+                             game_over_text.get_width() // 2, HEIGHT // 2)
+        )
+
+        score_text = self.font.render(
+            f"Score: {self.score}", quality.current.antialias, (255, 255, 255),)
+        screen.blit(score_text, (WIDTH // 2, HEIGHT // 2-40))
+
+
+def run_snake(screen):
+    SceneManager(screen).run(SnakeGame())
 
 
 if __name__ == "__main__":
+    sound.pre_init()
     pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    screen = ScaledDisplay.from_env((WIDTH, HEIGHT))
     run_snake(screen)
@@ -0,0 +1,50 @@
+import pygame
+
+# Rewind history. Games that support it pack their whole simulation state
+# into a fixed-size struct (save_state/load_state with a buffer and an
+# offset), and each simulated frame's state goes into a RewindBuffer: one
+# preallocated bytearray used as a ring, so memory is bounded and the
+# oldest frames are overwritten once it is full. Holding REWIND_KEY walks
+# back one frame per frame; PAUSE_KEY freezes the game.
+REWIND_SECONDS = 10
+PAUSE_KEY = pygame.K_p
+REWIND_KEY = pygame.K_r
+
+
+def xorshift32(state):
+    # Next state of a 32-bit xorshift generator (state must be non-zero).
+    # Games keep the state as a plain int so it snapshots in four bytes.
+    state ^= (state << 13) & 0xFFFFFFFF
+    state ^= state >> 17
+    state ^= (state << 5) & 0xFFFFFFFF
+    return state
+
+
+class RewindBuffer:
+    def __init__(self, record_size, capacity):
+        self.record_size = record_size
+        self.capacity = capacity
+        self.data = bytearray(record_size * capacity)
+        self.head = 0  # slot the next snapshot goes in
+        self.count = 0
+
+    def push(self):
+        # Offset in self.data to write the next snapshot at
+        offset = self.head * self.record_size
+        self.head += 1
+        if self.head == self.capacity:
+            self.head = 0
+        if self.count < self.capacity:
+            self.count += 1
+        return offset
+
+    def pop(self):
+        # Offset of the newest snapshot, which is removed, or None
+        if not self.count:
+            return None
+        self.count -= 1
+        self.head = (self.head or self.capacity) - 1
+        return self.head * self.record_size
+
+    def clear(self):
+        self.count = 0
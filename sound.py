@@ -0,0 +1,159 @@
+import os
+import time
+
+import numpy as np
+import pygame
+
+from scenes import FrameObserver
+
+# Sound effects. Games call Scene.play_sound(name) from their update code,
+# which only appends the name to the SceneManager's bounded queue; the
+# SoundBoard observer plays everything queued once the frame has been
+# presented, so mixing never happens inside a game's frame. Scenes driven
+# without a manager (envs.py, menu previews) stay silent.
+#
+# Every effect is loaded once up front: from sounds/<name>.wav or .ogg if
+# there is one, otherwise synthesized from EFFECTS. The board reserves a
+# fixed pool of mixer channels. A new effect takes a free channel, or else
+# steals the one playing the oldest effect of no higher priority; when all
+# are busy with more important effects it is dropped.
+FREQUENCY = 44100
+SAMPLE_SIZE = -16
+CHANNELS = 2
+BUFFER_SIZE = 256  # samples; about 6 ms at 44.1 kHz
+POOL_SIZE = 8
+SOUND_DIR = "sounds"
+
+# name -> (priority, waveform, note frequencies in Hz, seconds per note,
+#          volume); a note given as (start, end) slides between the two
+EFFECTS = {
+    "paddle": (0, "square", [(330, 440)], 0.05, 0.3),
+    "brick": (0, "square", [(880, 660)], 0.06, 0.3),
+    "flap": (0, "sine", [(300, 700)], 0.08, 0.5),
+    "shoot": (0, "square", [(1200, 300)], 0.1, 0.25),
+    "eat": (0, "sine", [(600, 1200)], 0.07, 0.5),
+    "hit": (1, "noise", [0], 0.2, 0.4),
+    "win": (2, "square", [523, 659, 784, 1047], 0.09, 0.3),
+    "lose": (2, "square", [392, 330, 262], 0.15, 0.3),
+}
+
+
+def pre_init():
+    # Call before pygame.init() so the mixer opens with a small buffer
+    pygame.mixer.pre_init(FREQUENCY, SAMPLE_SIZE, CHANNELS, BUFFER_SIZE)
+
+
+def synthesize(waveform, notes, note_seconds, frequency):
+    # Mono samples in [-1, 1]
+    length = int(note_seconds * frequency)
+    t = np.arange(length) / frequency
+    # Short attack and an exponential decay keep notes from clicking
+    envelope = np.minimum(1.0, t / 0.003) * np.exp(-3.0 * t / note_seconds)
+    rng = np.random.default_rng(0)
+    parts = []
+    for note in notes:
+        start, end = note if isinstance(note, tuple) else (note, note)
+        if waveform == "noise":
+            wave = rng.uniform(-1.0, 1.0, length)
+        else:
+            # Integrate the (linearly sliding) frequency to get the phase
+            hz = start + (end - start) * t / note_seconds
+            phase = 2 * np.pi * np.cumsum(hz) / frequency
+            wave = np.sin(phase)
+            if waveform == "square":
+                wave = np.sign(wave)
+        parts.append(wave * envelope)
+    return np.concatenate(parts)
+
+
+def make_sound(samples):
+    # Converts mono float samples to the mixer's format
+    frequency, size, channels = pygame.mixer.get_init()
+    if abs(size) == 32:
+        data = samples.astype(np.float32)
+    else:
+        bits = abs(size)
+        scale = 2 ** (bits - 1) - 1
+        data = np.round(samples * scale).astype(f"int{bits}")
+        if size > 0:
+            data = (data.astype(np.int32) + scale + 1).astype(f"uint{bits}")
+    if channels > 1:
+        data = np.repeat(data[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(data))
+
+
+def load_effect(name, waveform, notes, note_seconds, volume):
+    for extension in (".wav", ".ogg"):
+        path = os.path.join(SOUND_DIR, name + extension)
+        if os.path.exists(path):
+            try:
+                return pygame.mixer.Sound(path)
+            except pygame.error as e:
+                print(f"Error loading sound {path}: {e}")
+    frequency = pygame.mixer.get_init()[0]
+    sound = make_sound(synthesize(waveform, notes, note_seconds, frequency))
+    sound.set_volume(volume)
+    return sound
+
+
+class SoundBoard(FrameObserver):
+    shared_board = None
+
+    def __init__(self, pool_size=POOL_SIZE):
+        self.enabled = False
+        self.effects = {}  # name -> (priority, Sound)
+        self.stolen = 0
+        self.dropped = 0
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(FREQUENCY, SAMPLE_SIZE, CHANNELS, BUFFER_SIZE)
+            for name, (priority, *spec) in EFFECTS.items():
+                self.effects[name] = (priority, load_effect(name, *spec))
+        except (pygame.error, ValueError) as e:
+            print(f"Sound disabled: {e}")
+            return
+        # Reserved channels aren't handed out by Sound.play(), so nothing
+        # else competes for the pool
+        if pygame.mixer.get_num_channels() < pool_size:
+            pygame.mixer.set_num_channels(pool_size)
+        pygame.mixer.set_reserved(pool_size)
+        self.channels = [pygame.mixer.Channel(i) for i in range(pool_size)]
+        self.started = [0.0] * pool_size
+        self.priorities = [0] * pool_size
+        self.enabled = True
+
+    @classmethod
+    def shared(cls):
+        # One board per process, so effects load once for every manager
+        if cls.shared_board is None:
+            cls.shared_board = cls()
+        return cls.shared_board
+
+    def play(self, name):
+        priority, sound = self.effects[name]
+        free = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                free = i
+                break
+        if free is None:
+            stealable = [i for i, p in enumerate(self.priorities) if p <= priority]
+            if not stealable:
+                self.dropped += 1
+                return
+            free = min(stealable, key=lambda i: self.started[i])
+            self.stolen += 1
+        self.channels[free].play(sound)
+        self.started[free] = time.perf_counter()
+        self.priorities[free] = priority
+
+    def after_present(self, scene):
+        queue = scene.manager.sound_queue if scene.manager else None
+        if not queue:
+            return
+        # A name queued several times in one frame plays once
+        names = dict.fromkeys(queue)
+        queue.clear()
+        for name in names:
+            if name in self.effects:
+                self.play(name)
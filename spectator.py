@@ -0,0 +1,304 @@
+import argparse
+import math
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+import bots
+import envs
+import quality
+from previews import ENV_OPTIONS, STEP_RATES
+from scenes import Scene, SceneManager
+from viewport import ScaledDisplay
+
+# Spectator mode: a grid of independent bot-played instances of one game,
+# for watching autopilots (and regressions in them) side by side. Every
+# tile is a subsurface of the screen. Instances are stepped together once
+# per frame and a tile is only redrawn when its env state or score has
+# changed since it was last drawn.
+#
+# Up to TILES_PER_PROCESS instances run in the window's own process. Past
+# that they are split across worker processes that draw their tiles into
+# shared memory, and the exchange is pipelined: the steps requested in one
+# frame are collected, and their changed tiles blitted, in the next, so the
+# workers simulate while the window presents and waits for the clock.
+WIDTH, HEIGHT = 700, 500
+HEADER_HEIGHT = 30
+GAP = 2
+TILES_PER_PROCESS = 8
+MAX_STEPS_PER_FRAME = 4  # tiles that fall behind slow down instead
+BACKGROUND = (15, 15, 25)
+HEADER_COLOR = (200, 200, 220)
+
+
+def tile_rects(cols, rows):
+    # Tiles keep the games' aspect ratio, centred below the header
+    area_w, area_h = WIDTH - GAP, HEIGHT - HEADER_HEIGHT - GAP
+    scale = min((area_w / cols - GAP) / WIDTH, (area_h / rows - GAP) / HEIGHT)
+    w, h = int(WIDTH * scale), int(HEIGHT * scale)
+    left = (WIDTH - cols * (w + GAP) + GAP) // 2
+    top = HEADER_HEIGHT + (HEIGHT - HEADER_HEIGHT - rows * (h + GAP) + GAP) // 2
+    return [pygame.Rect(left + col * (w + GAP), top + row * (h + GAP), w, h)
+            for row in range(rows) for col in range(cols)]
+
+
+class TileBatch:
+    # Instances of one game, each played by its autopilot and drawn into
+    # its own tile-sized surface when its state changes
+    def __init__(self, name, count, tile_format):
+        options = ENV_OPTIONS.get(name, {})
+        self.envs = [envs.make_env(name, **options) for _ in range(count)]
+        for env in self.envs:
+            env.game.load_assets()
+            env.reset()
+        self.autopilots = [bots.make_autopilot(name) for _ in range(count)]
+        self.drawn = [None] * count  # (state bytes, score) last drawn
+        # Games draw full size into this, in the tiles' pixel format
+        self.scratch = pygame.Surface(self.envs[0].FRAME_SIZE, 0, tile_format)
+
+    def step(self, steps):
+        # Returns the scores of the episodes that finished
+        finished = []
+        for env, autopilot in zip(self.envs, self.autopilots):
+            game = env.game
+            for _ in range(steps):
+                _, _, done, _ = env.step(autopilot.act(game))
+                if done:
+                    finished.append(env.score())
+                    env.reset()
+        return finished
+
+    def render(self, tiles, smooth=True):
+        # Redraws the tiles whose instance changed; returns their indices
+        scale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+        changed = []
+        for i, env in enumerate(self.envs):
+            # env.state was filled in by the last step() or reset()
+            key = (env.state.tobytes(), env.score())
+            if key == self.drawn[i]:
+                continue
+            self.drawn[i] = key
+            env.game.draw(self.scratch)
+            scale(self.scratch, tiles[i].get_size(), tiles[i])
+            changed.append(i)
+        return changed
+
+    def invalidate(self):
+        self.drawn = [None] * len(self.drawn)
+
+
+def _worker(conn, name, start, stop, tile_size, shm_name, count):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    envs.ensure_display()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    width, height = tile_size
+    pixels = np.ndarray((count, height, width, 4), dtype=np.uint8, buffer=shm.buf)
+    shared = [pygame.image.frombuffer(pixels[i], tile_size, "RGBX")
+              for i in range(start, stop)]
+    # Games and scaling stay in the display format; only the small tiles
+    # are converted on their way into shared memory
+    tiles = [pygame.Surface(tile_size).convert() for _ in shared]
+    batch = TileBatch(name, stop - start, tiles[0])
+    try:
+        while True:
+            cmd, data = conn.recv()
+            if cmd == "step":
+                steps, smooth = data
+                finished = batch.step(steps)
+                changed = batch.render(tiles, smooth)
+                for i in changed:
+                    shared[i].blit(tiles[i], (0, 0))
+                conn.send(([start + i for i in changed], finished))
+            elif cmd == "close":
+                break
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        del shared, pixels
+        shm.close()
+        conn.close()
+
+
+class SpectatorScene(Scene):
+    caption = "Spectator"
+    fps = 60
+
+    def __init__(self, name, cols=4, rows=4, workers=None):
+        super().__init__()
+        if name not in envs.ENVS:
+            raise ValueError(f"Unknown game: {name}")
+        self.name = name
+        self.rects = tile_rects(cols, rows)
+        self.count = len(self.rects)
+        if workers is None:
+            workers = 0
+            if self.count > TILES_PER_PROCESS:
+                workers = min(os.cpu_count() or 1,
+                              math.ceil(self.count / TILES_PER_PROCESS))
+        self.workers = max(0, min(workers, self.count))
+        self.caption = f"Spectator - {name}"
+        self.batch = None
+        self.conns = []
+        self.procs = []
+        self.shm = None
+        self.views = []  # workers' tile images in shared memory
+        self.pending = False
+        self.owed = 0.0
+        self.steps = 0  # steps due at the next exchange
+        self.episodes = 0
+        self.total_score = 0
+        self.redrawn = 0  # tiles redrawn last frame
+
+    def on_enter(self):
+        super().on_enter()
+        self.font = pygame.font.Font(None, 24)
+        self.start()
+        self.full_redraw = True
+
+    def on_exit(self):
+        self.stop()
+
+    def start(self):
+        if self.batch is not None or self.conns:
+            return
+        screen = self.manager.screen
+        self.tiles = [screen.subsurface(rect) for rect in self.rects]
+        self.step_rate = STEP_RATES.get(self.name)
+        if self.workers == 0:
+            self.batch = TileBatch(self.name, self.count, screen)
+            if self.step_rate is None:
+                self.step_rate = self.batch.envs[0].game.fps
+            return
+        if self.step_rate is None:
+            self.step_rate = envs.make_env(self.name).game.fps
+
+        size = self.rects[0].size
+        width, height = size
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=self.count * height * width * 4)
+        pixels = np.ndarray((self.count, height, width, 4), dtype=np.uint8,
+                            buffer=self.shm.buf)
+        self.views = [pygame.image.frombuffer(pixels[i], size, "RGBX")
+                      for i in range(self.count)]
+        bounds = np.linspace(0, self.count, self.workers + 1).astype(int)
+        ctx = mp.get_context("spawn")
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(child, self.name, int(start), int(stop), size,
+                      self.shm.name, self.count),
+                daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def stop(self):
+        self.batch = None
+        for conn in self.conns:
+            try:
+                if self.pending:
+                    conn.recv()
+                conn.send(("close", None))
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+        self.conns, self.procs = [], []
+        self.pending = False
+        self.views = []
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            self.finished = True
+            self.leave()
+
+    def update(self, keys):
+        self.owed = min(self.owed + self.step_rate / self.fps, MAX_STEPS_PER_FRAME)
+        steps = int(self.owed)
+        self.owed -= steps
+        if self.batch is not None:
+            self.record(self.batch.step(steps))
+        else:
+            self.steps += steps
+
+    def record(self, finished):
+        self.episodes += len(finished)
+        self.total_score += sum(finished)
+
+    def draw(self, screen):
+        smooth = quality.current.smooth_scaling
+        if self.full_redraw:
+            screen.fill(BACKGROUND)
+        if self.batch is not None:
+            if self.full_redraw:
+                self.batch.invalidate()
+            self.redrawn = len(self.batch.render(self.tiles, smooth))
+        else:
+            self.exchange(smooth)
+        self.full_redraw = False
+        self.draw_header(screen)
+
+    def exchange(self, smooth):
+        # Blits the tiles changed by the steps sent last frame, then sends
+        # this frame's steps; the workers draw into shared memory only
+        # between the two, so nothing here races with them
+        changed = []
+        if self.pending:
+            for conn in self.conns:
+                indices, finished = conn.recv()
+                changed.extend(indices)
+                self.record(finished)
+            self.pending = False
+        if self.full_redraw:
+            changed = range(self.count)
+        for i in changed:
+            self.tiles[i].blit(self.views[i], (0, 0))
+        self.redrawn = len(changed)
+        if self.steps:
+            for conn in self.conns:
+                conn.send(("step", (self.steps, smooth)))
+            self.steps = 0
+            self.pending = True
+
+    def draw_header(self, screen):
+        screen.fill(BACKGROUND, (0, 0, WIDTH, HEADER_HEIGHT))
+        mean = self.total_score / self.episodes if self.episodes else 0
+        runner = f"{self.workers} workers" if self.workers else "in-process"
+        text = self.font.render(
+            f"{self.name} x{self.count} ({runner})   episodes {self.episodes}"
+            f"   mean score {mean:.1f}   redrawn {self.redrawn}",
+            quality.current.antialias, HEADER_COLOR)
+        screen.blit(text, (10, (HEADER_HEIGHT - text.get_height()) // 2))
+
+
+def run_spectator(screen, name, cols=4, rows=4, workers=None):
+    SceneManager(screen).run(SpectatorScene(name, cols, rows, workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch a grid of bot-played instances of a game.")
+    parser.add_argument("game", choices=sorted(bots.AUTOPILOTS))
+    parser.add_argument("--grid", default="4x4", help="columns x rows")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (0 runs every tile in-process)")
+    args = parser.parse_args()
+    cols, rows = (int(v) for v in args.grid.lower().split("x"))
+
+    pygame.init()
+    screen = ScaledDisplay.from_env((WIDTH, HEIGHT))
+    run_spectator(screen, args.game, cols, rows, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
+import errno
+import os
+import select
+import socket
+import sys
+import time
+
 import pygame
 import numpy as np
-import random
+
+import ttt_server
+from scenes import Scene, SceneManager
+from viewport import ScaledDisplay
+from tictactoe_ai import (AI, BOARD_COLS, BOARD_ROWS, HUMAN, WIN_LENGTH,
+                          BackgroundSearch, Search, get_lines)
 
 # Window and box constants
 WIDTH, HEIGHT = 700, 500
@@ -8,14 +20,9 @@ BOX_SIZE = 360
 BOX_X = (WIDTH - BOX_SIZE) // 2
 BOX_Y = 100  # space for title
 
-# Grid constants (inside box)
-BOARD_ROWS = 3
-BOARD_COLS = 3
-SQUARE_SIZE = BOX_SIZE // BOARD_COLS
-CIRCLE_RADIUS = SQUARE_SIZE // 3
-CIRCLE_WIDTH = 15
-CROSS_WIDTH = 25
-SPACE = SQUARE_SIZE // 4
+# Large board: five in a row on 15x15
+GOMOKU_SIZE = 15
+GOMOKU_WIN_LENGTH = 5
 
 # Colors
 BG_COLOR = (28, 170, 156)
@@ -23,220 +30,457 @@ LINE_COLOR = (23, 145, 135)
 CIRCLE_COLOR = (239, 231, 200)
 CROSS_COLOR = (66, 66, 66)
 
+AI_DELAY = 500  # milliseconds; the AI never answers faster than this
+AI_THINK_TIME = 1.5  # seconds of search per AI move
+
+SERVER_PORT = ttt_server.PORT
+CONNECT_TIMEOUT = 5  # seconds
+
+# connect_ex() results meaning the connection is still being made
+CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+                   getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)}
+
+
+class TicTacToeGame(Scene):
+    caption = "TicTacToe"
+    fps = 30
+
+    def __init__(self, rows=BOARD_ROWS, cols=BOARD_COLS, win_length=WIN_LENGTH,
+                 think_time=AI_THINK_TIME):
+        super().__init__()
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.think_time = think_time
+        self.lines = get_lines(rows, cols, win_length)
+
+        # Board geometry, scaled from the 3x3 layout
+        self.square = BOX_SIZE // max(rows, cols)
+        self.box_width = self.square * cols
+        self.box_height = self.square * rows
+        self.box_x = (WIDTH - self.box_width) // 2
+        self.line_width = max(1, self.square // 8)
+        self.circle_radius = self.square // 3
+        self.circle_width = max(2, self.square // 8)
+        self.cross_width = max(3, self.square * 5 // 24)
+        self.space = self.square // 4
+
+        self.search = None
+        self.assets_loaded = False
+        self.reset()
+
+    def load_assets(self):
+        if self.assets_loaded:
+            return
+        self.font = pygame.font.SysFont(None, 32)
+        self.small_font = pygame.font.SysFont(None, 24)
+        self.title_font = pygame.font.SysFont(None, 54)
+        self.title_text = self.title_font.render(self.caption, True, (0, 255, 0))
+        self.assets_loaded = True
+
+    def reset(self):
+        self.cancel_search()
+        self.board = np.zeros((self.rows, self.cols))
+        self.player = 1
+        self.game_over = False
+        self.winner = None
+        self.win_line = None
+        self.waiting_for_ai = False
+        self.ai_wait = 0  # ms left before the AI may move
+        self.finished = False
+
+    def on_enter(self):
+        super().on_enter()
+        self.load_assets()
+
+    def on_exit(self):
+        # Paused: stop thinking; the search restarts when we come back
+        self.cancel_search()
 
-def run_tictactoe(screen):
-    font = pygame.font.SysFont(None, 32)
-    title_font = pygame.font.SysFont(None, 54)
-    board = np.zeros((BOARD_ROWS, BOARD_COLS))
+    def cancel_search(self):
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
 
-    def draw_box():
+    def draw_box(self, screen):
         pygame.draw.rect(screen, (0, 255, 0),
-                         (BOX_X-3, BOX_Y-3, BOX_SIZE+6, BOX_SIZE+6), 3)
+                         (self.box_x-3, BOX_Y-3, self.box_width+6, self.box_height+6), 3)
 
-    def draw_lines():
+    def draw_lines(self, screen):
         # Horizontal
-        for i in range(1, BOARD_ROWS):
+        for i in range(1, self.rows):
             pygame.draw.line(
                 screen, LINE_COLOR,
-                (BOX_X, BOX_Y + i * SQUARE_SIZE),
-                (BOX_X + BOX_SIZE, BOX_Y + i * SQUARE_SIZE),
-                15
+                (self.box_x, BOX_Y + i * self.square),
+                (self.box_x + self.box_width, BOX_Y + i * self.square),
+                self.line_width
             )
         # Vertical
-        for i in range(1, BOARD_COLS):
+        for i in range(1, self.cols):
             pygame.draw.line(
                 screen, LINE_COLOR,
-                (BOX_X + i * SQUARE_SIZE, BOX_Y),
-                (BOX_X + i * SQUARE_SIZE, BOX_Y + BOX_SIZE),
-                15
+                (self.box_x + i * self.square, BOX_Y),
+                (self.box_x + i * self.square, BOX_Y + self.box_height),
+                self.line_width
             )
 
-    def draw_figures():
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                cx = BOX_X + col * SQUARE_SIZE + SQUARE_SIZE // 2
-                cy = BOX_Y + row * SQUARE_SIZE + SQUARE_SIZE // 2
-                if board[row][col] == 1:
-                    pygame.draw.circle(
-                        screen, CIRCLE_COLOR, (cx,
-                                               cy), CIRCLE_RADIUS, CIRCLE_WIDTH
-                    )
-                elif board[row][col] == 2:
-                    # Descending diagonal
-                    start_desc = (BOX_X + col * SQUARE_SIZE + SPACE,
-                                  BOX_Y + row * SQUARE_SIZE + SQUARE_SIZE - SPACE)
-                    end_desc = (BOX_X + col * SQUARE_SIZE + SQUARE_SIZE -
-                                SPACE, BOX_Y + row * SQUARE_SIZE + SPACE)
-                    pygame.draw.line(screen, CROSS_COLOR,
-                                     start_desc, end_desc, CROSS_WIDTH)
-                    # Ascending diagonal
-                    start_asc = (BOX_X + col * SQUARE_SIZE + SPACE,
-                                 BOX_Y + row * SQUARE_SIZE + SPACE)
-                    end_asc = (BOX_X + col * SQUARE_SIZE + SQUARE_SIZE -
-                               SPACE, BOX_Y + row * SQUARE_SIZE + SQUARE_SIZE - SPACE)
-                    pygame.draw.line(screen, CROSS_COLOR,
-                                     start_asc, end_asc, CROSS_WIDTH)
-
-    def mark_square(row, col, player):
-        board[row][col] = player
-
-    def available_square(row, col):
-        return board[row][col] == 0
-
-    def is_board_full():
-        return not (board == 0).any()
-
-    def check_win(player):
-        for col in range(BOARD_COLS):
-            if all([board[row][col] == player for row in range(BOARD_ROWS)]):
-                draw_vertical_winning_line(col, player)
-                return True
-        for row in range(BOARD_ROWS):
-            if all([board[row][col] == player for col in range(BOARD_COLS)]):
-                draw_horizontal_winning_line(row, player)
-                return True
-        if all([board[i][i] == player for i in range(BOARD_COLS)]):
-            draw_desc_diagonal(player)
-            return True
-        if all([board[i][BOARD_COLS - i - 1] == player for i in range(BOARD_COLS)]):
-            draw_asc_diagonal(player)
-            return True
-        return False
-
-    def draw_vertical_winning_line(col, player):
-        posX = BOX_X + col * SQUARE_SIZE + SQUARE_SIZE // 2
-        color = CIRCLE_COLOR if player == 1 else CROSS_COLOR
-        pygame.draw.line(screen, color, (posX, BOX_Y + 15),
-                         (posX, BOX_Y + BOX_SIZE - 15), 15)
+    def draw_figures(self, screen):
+        square, space = self.square, self.space
+        for row, col in np.argwhere(self.board):
+            x = self.box_x + col * square
+            y = BOX_Y + row * square
+            if self.board[row, col] == 1:
+                pygame.draw.circle(
+                    screen, CIRCLE_COLOR, (x + square // 2, y + square // 2),
+                    self.circle_radius, self.circle_width
+                )
+            else:
+                # Descending diagonal
+                pygame.draw.line(screen, CROSS_COLOR,
+                                 (x + space, y + square - space),
+                                 (x + square - space, y + space), self.cross_width)
+                # Ascending diagonal
+                pygame.draw.line(screen, CROSS_COLOR,
+                                 (x + space, y + space),
+                                 (x + square - space, y + square - space),
+                                 self.cross_width)
 
-    def draw_horizontal_winning_line(row, player):
-        posY = BOX_Y + row * SQUARE_SIZE + SQUARE_SIZE // 2
-        color = CIRCLE_COLOR if player == 1 else CROSS_COLOR
-        pygame.draw.line(screen, color, (BOX_X + 15, posY),
-                         (BOX_X + BOX_SIZE - 15, posY), 15)
+    def mark_square(self, row, col, player):
+        self.board[row][col] = player
 
-    def draw_asc_diagonal(player):
-        color = CIRCLE_COLOR if player == 1 else CROSS_COLOR
-        pygame.draw.line(screen, color, (BOX_X + 15, BOX_Y +
-                         BOX_SIZE - 15), (BOX_X + BOX_SIZE - 15, BOX_Y + 15), 15)
+    def available_square(self, row, col):
+        return self.board[row][col] == 0
+
+    def is_board_full(self):
+        return not (self.board == 0).any()
+
+    def winning_line(self, player):
+        # ((row, col), (row, col)) at the two ends of a completed line, or None
+        cells = self.board.ravel()[self.lines.windows]
+        complete = np.flatnonzero((cells == player).all(axis=1))
+        if not len(complete):
+            return None
+        window = self.lines.windows[complete[0]]
+        return divmod(int(window[0]), self.cols), divmod(int(window[-1]), self.cols)
 
-    def draw_desc_diagonal(player):
+    def check_win(self, player):
+        return self.winning_line(player) is not None
+
+    def end_turn(self, player):
+        # Called after each move; ends the game on a line or a full board
+        line = self.winning_line(player)
+        if line is not None:
+            self.winner = player
+            self.win_line = line
+            self.game_over = True
+        elif self.is_board_full():
+            self.game_over = True
+
+    def draw_winning_line(self, screen, player):
+        (row0, col0), (row1, col1) = self.win_line
+        # Run from edge to edge of the end squares, 3x3 style
+        reach = self.square // 2 - self.square // 8
+        dx = (col1 > col0) - (col1 < col0)
+        dy = (row1 > row0) - (row1 < row0)
+        half = self.square // 2
+        start = (self.box_x + col0 * self.square + half - dx * reach,
+                 BOX_Y + row0 * self.square + half - dy * reach)
+        end = (self.box_x + col1 * self.square + half + dx * reach,
+               BOX_Y + row1 * self.square + half + dy * reach)
         color = CIRCLE_COLOR if player == 1 else CROSS_COLOR
-        pygame.draw.line(screen, color, (BOX_X + 15, BOX_Y + 15),
-                         (BOX_X + BOX_SIZE - 15, BOX_Y + BOX_SIZE - 15), 15)
+        pygame.draw.line(screen, color, start, end, max(3, self.square // 8))
+
+    def ai_move(self, think_time=None):
+        # Synchronous AI turn, for headless play
+        search = Search(self.lines, self.board,
+                        self.think_time if think_time is None else think_time)
+        self.finish_ai_move(search.best_move())
 
-    def ai_move():
-        empty = [(r, c) for r in range(BOARD_ROWS)
-                 for c in range(BOARD_COLS) if board[r][c] == 0]
-        if empty:
-            move = random.choice(empty)
-            mark_square(move[0], move[1], 2)
+    def finish_ai_move(self, move):
+        if move is not None:
+            self.mark_square(move[0], move[1], AI)
+            self.end_turn(AI)
+        self.waiting_for_ai = False
+        self.player = HUMAN
 
-    def get_grid_pos(mouse_pos):
+    def play(self, row, col):
+        # Human move; returns False if the square can't be played
+        if self.game_over or self.player != 1 or self.waiting_for_ai:
+            return False
+        if row is None or not self.available_square(row, col):
+            return False
+        self.mark_square(row, col, self.player)
+        self.end_turn(self.player)
+        if not self.game_over:
+            self.waiting_for_ai = True
+            self.ai_wait = AI_DELAY
+        return True
+
+    def grid_pos(self, mouse_pos):
         mx, my = mouse_pos
-        if (BOX_X <= mx < BOX_X + BOX_SIZE) and (BOX_Y <= my < BOX_Y + BOX_SIZE):
-            col = (mx - BOX_X) // SQUARE_SIZE
-            row = (my - BOX_Y) // SQUARE_SIZE
+        if (self.box_x <= mx < self.box_x + self.box_width
+                and BOX_Y <= my < BOX_Y + self.box_height):
+            col = (mx - self.box_x) // self.square
+            row = (my - BOX_Y) // self.square
             return int(row), int(col)
         return None, None
 
-    # Game loop
-    screen.fill(BG_COLOR)
-    draw_box()
-    draw_lines()
-    player = 1
-    game_over = False
-    waiting_for_ai = False
-    ai_wait_start = 0
-    AI_DELAY = 500  # milliseconds
+    def handle_event(self, event):
+        if event.type == pygame.QUIT or (
+                event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            # Pause back to the menu; after game over this ends the game
+            self.finished = self.game_over
+            self.leave()
+            return
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.play(*self.grid_pos(event.pos))
+
+    def update(self, keys):
+        # The AI searches in the background and moves once both the search
+        # and the minimum display delay are done
+        if not self.waiting_for_ai or self.game_over:
+            return
+        if self.search is None:
+            self.search = BackgroundSearch(self.lines, self.board, self.think_time)
+        self.ai_wait -= 1000 / self.fps
+        if self.ai_wait <= 0 and self.search.done():
+            move = self.search.move
+            self.search = None
+            self.finish_ai_move(move)
+
+    def latency_probe(self):
+        return int((self.board != 0).sum())
 
-    clock = pygame.time.Clock()
+    def status_text(self):
+        if self.search is None:
+            return None
+        depth = self.search.search.depth
+        return "AI thinking..." + (f" depth {depth}" if depth else "")
 
-    while True:
+    def result_text(self):
+        if self.winner == HUMAN:
+            return "You Win!"
+        if self.winner == AI:
+            return "AI Wins!"
+        return "It's a Tie!"
+
+    def draw(self, screen):
         # Draw background and box each frame
         screen.fill(BG_COLOR)
-        draw_box()
+        self.draw_box(screen)
         # Draw title above the box
-        title_text = title_font.render("TicTacToe", True, (0, 255, 0))
-        screen.blit(title_text, (WIDTH // 2 -
-                    title_text.get_width() // 2, BOX_Y - 60))
-        draw_lines()
-        draw_figures()
-        pygame.display.update()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                return
-            if (
-                event.type == pygame.MOUSEBUTTONDOWN
-                and not game_over
-                and player == 1
-                and not waiting_for_ai
-            ):
-                clicked_row, clicked_col = get_grid_pos(event.pos)
-                if clicked_row is not None and available_square(clicked_row, clicked_col):
-                    mark_square(clicked_row, clicked_col, player)
-                    if check_win(player):
-                        game_over = True
-                    else:
-                        waiting_for_ai = True
-                        ai_wait_start = pygame.time.get_ticks()
-
-        # Handle AI move after a delay
-        if waiting_for_ai and not game_over:
-            now = pygame.time.get_ticks()
-            if now - ai_wait_start >= AI_DELAY:
-                ai_move()
-                if check_win(2):
-                    game_over = True
-                else:
-                    player = 1
-                waiting_for_ai = False
-                player = 1
-
-        if is_board_full() and not game_over:
-            game_over = True
-
-        clock.tick(30)
-
-        if game_over:
+        screen.blit(self.title_text, (WIDTH // 2 -
+                    self.title_text.get_width() // 2, BOX_Y - 60))
+        self.draw_lines(screen)
+        self.draw_figures(screen)
+
+        status = self.status_text()
+        if status:
+            text = self.small_font.render(status, True, (0, 255, 0))
+            screen.blit(text, (WIDTH // 2 - text.get_width() // 2,
+                               BOX_Y + self.box_height + 10))
+
+        if self.game_over:
             # Show winner or tie
-            screen.fill(BG_COLOR)
-            draw_box()
-            title_text = title_font.render("TicTacToe", True, (0, 255, 0))
-            screen.blit(title_text, (WIDTH // 2 -
-                        title_text.get_width() // 2, BOX_Y - 60))
-            draw_lines()
-            draw_figures()
-            if check_win(1):
-                msg = "You Win!"
-            elif check_win(2):
-                msg = "AI Wins!"
-            else:
-                msg = "It's a Tie!"
-            text = font.render(msg, True, (0, 255, 0))
+            if self.winner is not None:
+                self.draw_winning_line(screen, self.winner)
+            text = self.font.render(self.result_text(), True, (0, 255, 0))
             screen.blit(
                 text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - 20))
-            prompt = font.render("Press ESC to return", True, (0, 255, 0))
+            prompt = self.font.render("Press ESC to return", True, (0, 255, 0))
             screen.blit(
                 prompt, (WIDTH // 2 - prompt.get_width() // 2, HEIGHT // 2 + 20))
-            pygame.display.update()
 
-            # Wait for ESC or QUIT
-            waiting = True
-            while waiting:
-                for event in pygame.event.get():
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                        return
-                    elif event.type == pygame.QUIT:
-                        return
-                clock.tick(10)
+
+class GomokuGame(TicTacToeGame):
+    caption = "Gomoku"
+
+    def __init__(self):
+        super().__init__(GOMOKU_SIZE, GOMOKU_SIZE, GOMOKU_WIN_LENGTH)
+
+
+class OnlineTicTacToeGame(TicTacToeGame):
+    # 3x3 against another player through a ttt_server.py match server. The
+    # server owns the game; the board only changes when it echoes a move.
+    # The socket never blocks: connect() only starts connecting, and update()
+    # polls until it can send JOIN, so the window keeps drawing meanwhile.
+    caption = "TicTacToe Online"
+
+    def __init__(self, address):
+        self.address = address
+        self.sock = None
+        self.connecting = False
+        self.connect_deadline = 0.0
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.disconnect()
+        self.me = 0  # our player number once matched
+        self.turn = 1
+        self.buffer = bytearray()
+        self.status = "Connecting..."
+
+    def on_enter(self):
+        super().on_enter()
+        if self.sock is None and not self.game_over:
+            self.connect()
+
+    def on_exit(self):
+        # Leaving forfeits the match, so the next visit starts a new one
+        super().on_exit()
+        self.disconnect()
+        self.finished = True
+
+    def connect(self):
+        self.protocol = ttt_server
+        host, port = self.address
+        try:
+            # Name lookup can still block, but not for a numeric address
+            family, kind, proto, _, sockaddr = socket.getaddrinfo(
+                host, port, type=socket.SOCK_STREAM)[0]
+            sock = socket.socket(family, kind, proto)
+        except OSError as e:
+            self.connection_lost(f"Can't reach server: {e}")
+            return
+        sock.setblocking(False)
+        error = sock.connect_ex(sockaddr)
+        if error and error not in CONNECT_PENDING:
+            sock.close()
+            self.connection_lost(f"Can't reach server: {os.strerror(error)}")
+            return
+        self.sock = sock
+        self.connecting = True
+        self.connect_deadline = time.monotonic() + CONNECT_TIMEOUT
+        self.status = "Connecting..."
+
+    def finish_connect(self):
+        # Returns True once connected and joined; polled from update()
+        sock = self.sock
+        # Windows reports a failed connect as an exception, not writability
+        _, writable, failed = select.select([], [sock], [sock], 0)
+        if not writable and not failed:
+            if time.monotonic() > self.connect_deadline:
+                self.connection_lost("Can't reach server: timed out")
+            return False
+        error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            self.connection_lost(f"Can't reach server: {os.strerror(error)}")
+            return False
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.send(self.protocol.pack(self.protocol.JOIN))
+        except OSError as e:
+            self.connection_lost(f"Can't reach server: {e}")
+            return False
+        self.connecting = False
+        self.status = "Waiting for an opponent..."
+        return True
+
+    def disconnect(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        self.connecting = False
+
+    def connection_lost(self, status):
+        self.disconnect()
+        self.status = status
+        self.game_over = True
+
+    def play(self, row, col):
+        if self.game_over or self.sock is None or self.turn != self.me:
+            return False
+        if row is None or not self.available_square(row, col):
+            return False
+        try:
+            self.sock.send(self.protocol.pack(self.protocol.MOVE, row, col))
+        except OSError as e:
+            self.connection_lost(f"Connection lost: {e}")
+            return False
+        self.turn = 0  # until the server echoes the move
+        return True
+
+    def update(self, keys):
+        if self.sock is None:
+            return
+        if self.connecting and not self.finish_connect():
+            return
+        protocol = self.protocol
+        try:
+            data = self.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.connection_lost("Connection lost")
+            return
+        self.buffer += data
+        try:
+            messages = protocol.split_messages(self.buffer)
+        except protocol.ProtocolError as e:
+            self.connection_lost(str(e))
+            return
+        for kind, fields in messages:
+            if kind == protocol.MATCHED:
+                self.me = fields[0]
+                self.turn = 1
+            elif kind == protocol.MOVED:
+                number, row, col, result = fields
+                self.mark_square(row, col, number)
+                self.turn = 3 - number
+                if result:
+                    self.end_turn(number)
+                    self.disconnect()
+            elif kind == protocol.ERROR:
+                self.turn = self.me  # rejected; try again
+            elif kind == protocol.OPPONENT_LEFT:
+                self.connection_lost("Opponent left")
+
+    def status_text(self):
+        if self.game_over:
+            return None
+        if not self.me:
+            return self.status
+        mark = "O" if self.me == 1 else "X"
+        if self.turn == self.me:
+            return f"Your turn ({mark})"
+        return f"Opponent's turn (you are {mark})"
+
+    def result_text(self):
+        if self.winner is not None:
+            return "You Win!" if self.winner == self.me else "You Lose!"
+        if self.is_board_full():
+            return "It's a Tie!"
+        return self.status
+
+
+def run_tictactoe(screen, rows=BOARD_ROWS, cols=BOARD_COLS, win_length=WIN_LENGTH,
+                  server=None):
+    # server: (host, port) of a ttt_server.py to play a person instead
+    if server is not None:
+        game = OnlineTicTacToeGame(server)
+    elif (rows, cols, win_length) == (GOMOKU_SIZE, GOMOKU_SIZE, GOMOKU_WIN_LENGTH):
+        game = GomokuGame()
+    else:
+        game = TicTacToeGame(rows, cols, win_length)
+    SceneManager(screen).run(game)
+
+
+def run_gomoku(screen):
+    run_tictactoe(screen, GOMOKU_SIZE, GOMOKU_SIZE, GOMOKU_WIN_LENGTH)
 
 
-# For standalone testing:
+# For standalone testing (python tictactoe.py --gomoku for the 15x15 board,
+# --connect host[:port] to play through a ttt_server.py):
 if __name__ == '__main__':
     pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    run_tictactoe(screen)
+    screen = ScaledDisplay.from_env((WIDTH, HEIGHT))
+    if "--gomoku" in sys.argv:
+        run_gomoku(screen)
+    elif "--connect" in sys.argv:
+        host, _, port = sys.argv[sys.argv.index("--connect") + 1].partition(":")
+        run_tictactoe(screen, server=(host, int(port or SERVER_PORT)))
+    else:
+        run_tictactoe(screen)
@@ -0,0 +1,206 @@
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+# Computer player for TicTacToeGame on any board size and win length, from
+# 3x3 tic-tac-toe up to 15x15 five in a row. The board is scanned through
+# every win_length-long window of cells (rows, columns and both diagonals)
+# at once with NumPy. A window's stone counts give the static evaluation,
+# the threats (windows one stone short of a line) and the move ordering.
+# The search is negamax alpha-beta with iterative deepening; it returns the
+# best move of the deepest search finished before the time limit.
+HUMAN, AI = 1, 2
+
+# The standard board, shared with ttt_server.py, which has to stay
+# importable without pygame
+BOARD_ROWS = 3
+BOARD_COLS = 3
+WIN_LENGTH = 3
+
+MAX_CANDIDATES = 12  # moves searched per position, best-ordered first
+WIN_SCORE = 1e12
+DEFENSE = 0.9  # how much blocking a line is worth next to extending one
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class Lines:
+    def __init__(self, rows, cols, length):
+        self.rows = rows
+        self.cols = cols
+        self.length = length
+        self.size = rows * cols
+        index = np.arange(self.size).reshape(rows, cols)
+        steps = np.arange(length)
+        windows = []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for r in range(rows):
+                for c in range(cols):
+                    end_r, end_c = r + dr * (length - 1), c + dc * (length - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        windows.append(index[r + dr * steps, c + dc * steps])
+        # (windows, length) flat cell indices
+        self.windows = np.array(windows).reshape(-1, length)
+        self.flat_windows = self.windows.ravel()
+        # Windows through each cell, to check whether a move completed one
+        self.cell_windows = [
+            self.windows[(self.windows == i).any(axis=1)]
+            for i in range(self.size)
+        ]
+        # Cells hold 0, 1 for HUMAN or length + 1 for AI, so a window's sum
+        # encodes both players' stone counts
+        self.codes = np.array([0, 1, length + 1])
+        self.weights = 10.0 ** np.arange(length + 1)
+        self.weights[0] = 0
+
+    def encode(self, board):
+        return self.codes[np.asarray(board, dtype=int).ravel()]
+
+    def counts(self, cells, player):
+        # (own, opposing) stone counts of every window for `player`
+        sums = cells[self.windows].sum(axis=1)
+        human, ai = sums % (self.length + 1), sums // (self.length + 1)
+        return (ai, human) if player == AI else (human, ai)
+
+    def evaluate(self, cells, player):
+        # Static score from `player`'s point of view
+        mine, theirs = self.counts(cells, player)
+        return float((self.weights[mine] * (theirs == 0)).sum()
+                     - (self.weights[theirs] * (mine == 0)).sum())
+
+    def is_win(self, cells, move):
+        sums = cells[self.cell_windows[move]].sum(axis=1)
+        return bool((sums == self.length * cells[move]).any())
+
+    def candidates(self, cells, player, limit=MAX_CANDIDATES):
+        # Moves worth searching, best first
+        empty = cells == 0
+        mine, theirs = self.counts(cells, player)
+        short = self.length - 1
+
+        # Completing our own line wins outright
+        wins = self.windows[(mine == short) & (theirs == 0)]
+        if len(wins):
+            return [int(wins[0][empty[wins[0]]][0])]
+        # Otherwise every opposing line one short of a win must be blocked
+        threats = self.windows[(theirs == short) & (mine == 0)]
+        if len(threats):
+            blocks = np.unique(threats[empty[threats]])
+            return [int(move) for move in blocks[:limit]]
+
+        # Score each empty cell by the windows it extends or spoils
+        value = (self.weights[np.minimum(mine + 1, self.length)] * (theirs == 0)
+                 + DEFENSE * self.weights[np.minimum(theirs + 1, self.length)]
+                 * (mine == 0))
+        scores = np.bincount(self.flat_windows,
+                             weights=np.repeat(value, self.length),
+                             minlength=self.size)
+        scores[~empty] = -1
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [int(move) for move in order if empty[move]]
+
+
+@lru_cache(maxsize=None)
+def get_lines(rows, cols, length):
+    return Lines(rows, cols, length)
+
+
+class Search:
+    def __init__(self, lines, board, time_limit, cancel=None):
+        self.lines = lines
+        self.cells = lines.encode(board)
+        self.deadline = time.perf_counter() + time_limit
+        self.cancel = cancel
+        self.depth = 0  # deepest search finished so far
+        self.nodes = 0
+
+    def check_time(self):
+        if time.perf_counter() > self.deadline or (
+                self.cancel is not None and self.cancel.is_set()):
+            raise SearchCancelled()
+
+    def negamax(self, cells, player, depth, alpha, beta, ply):
+        self.nodes += 1
+        self.check_time()
+        if depth == 0:
+            return self.lines.evaluate(cells, player)
+        moves = self.lines.candidates(cells, player)
+        if not moves:
+            return 0.0  # Board full: a tie
+        code = self.lines.codes[player]
+        best = -np.inf
+        for move in moves:
+            cells[move] = code
+            if self.lines.is_win(cells, move):
+                score = WIN_SCORE - ply
+            else:
+                score = -self.negamax(cells, 3 - player, depth - 1,
+                                      -beta, -alpha, ply + 1)
+            cells[move] = 0
+            if score > best:
+                best = score
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        return best
+
+    def search_root(self, moves, depth):
+        cells = self.cells.copy()
+        code = self.lines.codes[AI]
+        best_move, alpha = moves[0], -np.inf
+        for move in moves:
+            cells[move] = code
+            if self.lines.is_win(cells, move):
+                score = WIN_SCORE
+            else:
+                score = -self.negamax(cells, HUMAN, depth - 1,
+                                      -np.inf, -alpha, 1)
+            cells[move] = 0
+            if score > alpha:
+                best_move, alpha = move, score
+        return best_move, alpha
+
+    def best_move(self):
+        # (row, col) for the AI, or None on a full board
+        moves = self.lines.candidates(self.cells, AI)
+        if not moves:
+            return None
+        best = moves[0]
+        empty = int((self.cells == 0).sum())
+        if len(moves) > 1:
+            for depth in range(1, empty + 1):
+                try:
+                    best, score = self.search_root(moves, depth)
+                except SearchCancelled:
+                    break
+                self.depth = depth
+                # Search the previous best move first next time
+                moves = [best] + [move for move in moves if move != best]
+                if abs(score) > WIN_SCORE / 2:
+                    break  # Forced win or loss found
+        return divmod(best, self.lines.cols)
+
+
+class BackgroundSearch:
+    # Runs a Search in a worker thread so the game loop keeps drawing and
+    # handling input; poll done() and read `move` once it is
+    def __init__(self, lines, board, time_limit):
+        self.cancelled = threading.Event()
+        self.search = Search(lines, board, time_limit, self.cancelled)
+        self.move = None
+        self.thread = threading.Thread(
+            target=self.run, name="tictactoe-ai", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        self.move = self.search.best_move()
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def cancel(self):
+        self.cancelled.set()
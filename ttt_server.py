@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+
+from tictactoe_ai import BOARD_COLS, BOARD_ROWS, WIN_LENGTH, get_lines
+
+# Headless tic-tac-toe match server. Players connect over TCP, ask for a
+# match and are paired first come, first served; player 1 moves first.
+# Every message is a type byte followed by fixed-size unsigned byte fields:
+#   client -> server   JOIN                       find me a match
+#                      MOVE row col
+#   server -> client   MATCHED player             you are player 1 or 2
+#                      MOVED player row col result  sent to both players
+#                      ERROR code
+#                      OPPONENT_LEFT
+# MOVED's result is 0 while the game goes on, the winning player, or TIE.
+#
+#   python ttt_server.py serve [--port]
+#   python ttt_server.py loadtest [--clients --duration --think-ms]
+# The load test starts a server process (unless --no-spawn) and plays
+# random moves from simulated clients, then reports moves per second and
+# the move round-trip latency.
+JOIN, MOVE = 1, 2
+MATCHED, MOVED, ERROR, OPPONENT_LEFT = 16, 17, 18, 19
+MESSAGES = {
+    JOIN: struct.Struct("!B"),
+    MOVE: struct.Struct("!BBB"),
+    MATCHED: struct.Struct("!BB"),
+    MOVED: struct.Struct("!BBBBB"),
+    ERROR: struct.Struct("!BB"),
+    OPPONENT_LEFT: struct.Struct("!B"),
+}
+TIE = 3
+
+# ERROR codes
+NOT_IN_MATCH, NOT_YOUR_TURN, BAD_SQUARE, SQUARE_TAKEN = 1, 2, 3, 4
+
+PORT = 7878
+READ_SIZE = 4096
+HIGH_WATER = 64 * 1024  # a client with this much unsent is dropped
+
+# Lines through each square, from the same rules the game uses
+LINES_THROUGH = [
+    [tuple(int(cell) for cell in window) for window in windows]
+    for windows in get_lines(BOARD_ROWS, BOARD_COLS, WIN_LENGTH).cell_windows
+]
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def pack(kind, *fields):
+    return MESSAGES[kind].pack(kind, *fields)
+
+
+def split_messages(buffer):
+    # Complete messages at the front of buffer, as (type, fields); consumed
+    # bytes are removed and a partial message is left for the next read
+    messages = []
+    offset = 0
+    while offset < len(buffer):
+        message = MESSAGES.get(buffer[offset])
+        if message is None:
+            raise ProtocolError(f"Unknown message type {buffer[offset]}")
+        if offset + message.size > len(buffer):
+            break
+        fields = message.unpack_from(buffer, offset)
+        messages.append((fields[0], fields[1:]))
+        offset += message.size
+    del buffer[:offset]
+    return messages
+
+
+class Match:
+    __slots__ = ("board", "turn", "players", "moves", "over")
+
+    def __init__(self, first, second):
+        self.board = bytearray(BOARD_ROWS * BOARD_COLS)
+        self.turn = 1
+        self.players = (first, second)
+        self.moves = 0
+        self.over = False
+
+    def play(self, number, row, col):
+        # Returns (error code or 0, result)
+        if self.over or number != self.turn:
+            return NOT_YOUR_TURN, 0
+        if not (0 <= row < BOARD_ROWS and 0 <= col < BOARD_COLS):
+            return BAD_SQUARE, 0
+        square = row * BOARD_COLS + col
+        if self.board[square]:
+            return SQUARE_TAKEN, 0
+        board = self.board
+        board[square] = number
+        self.moves += 1
+        self.turn = 3 - number
+        for line in LINES_THROUGH[square]:
+            if all(board[cell] == number for cell in line):
+                self.over = True
+                return 0, number
+        if self.moves == len(board):
+            self.over = True
+            return 0, TIE
+        return 0, 0
+
+
+class Player:
+    __slots__ = ("writer", "match", "number", "closed")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.number = 0
+        self.closed = False
+
+    def send(self, data):
+        # Messages go to opponents as well as to the player being served,
+        # and nothing can wait for either to read, so a player that lets
+        # its queue grow past HIGH_WATER is cut off instead
+        if self.closed:
+            return
+        transport = self.writer.transport
+        transport.write(data)
+        if transport.get_write_buffer_size() > HIGH_WATER:
+            self.closed = True
+            transport.abort()
+
+
+class MatchServer:
+    def __init__(self):
+        self.waiting = deque()
+        self.connections = 0
+        self.active = 0  # matches in progress
+        self.matches = 0
+        self.moves = 0
+        self.errors = 0
+
+    async def handle(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        player = Player(writer)
+        self.connections += 1
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                buffer += data
+                for kind, fields in split_messages(buffer):
+                    self.dispatch(player, kind, fields)
+        except (ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.connections -= 1
+            player.closed = True
+            self.leave_match(player)
+            writer.close()
+
+    def dispatch(self, player, kind, fields):
+        if player.closed:
+            return  # dropped; its connection is closing
+        if kind == JOIN:
+            self.leave_match(player)
+            self.join(player)
+        elif kind == MOVE:
+            self.move(player, *fields)
+        else:
+            raise ProtocolError(f"Unexpected message type {kind}")
+
+    def join(self, player):
+        while self.waiting:
+            opponent = self.waiting.popleft()
+            if (opponent is not player and not opponent.closed
+                    and opponent.match is None):
+                break
+        else:
+            self.waiting.append(player)
+            return
+        match = Match(opponent, player)
+        for number, each in enumerate(match.players, 1):
+            each.match = match
+            each.number = number
+            each.send(pack(MATCHED, number))
+        self.active += 1
+        self.matches += 1
+
+    def move(self, player, row, col):
+        match = player.match
+        if match is None:
+            self.errors += 1
+            player.send(pack(ERROR, NOT_IN_MATCH))
+            return
+        error, result = match.play(player.number, row, col)
+        if error:
+            self.errors += 1
+            player.send(pack(ERROR, error))
+            return
+        self.moves += 1
+        message = pack(MOVED, player.number, row, col, result)
+        for each in match.players:
+            each.send(message)
+        if result:
+            self.end_match(match)
+
+    def end_match(self, match):
+        for each in match.players:
+            each.match = None
+        self.active -= 1
+
+    def leave_match(self, player):
+        match = player.match
+        if match is None:
+            return
+        if not match.over:
+            match.over = True
+            for each in match.players:
+                if each is not player:
+                    each.send(pack(OPPONENT_LEFT))
+        self.end_match(match)
+
+    async def report(self, interval):
+        last_moves, last_time = 0, time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            rate = (self.moves - last_moves) / (now - last_time)
+            last_moves, last_time = self.moves, now
+            print(f"{self.connections} connections, {self.active} active "
+                  f"matches, {self.matches} played, {rate:.0f} moves/s, "
+                  f"{self.errors} errors", flush=True)
+
+
+def raise_file_limit():
+    # Every client is a file descriptor; the default soft limit is often 1024
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+async def serve(host, port, report_every):
+    server = MatchServer()
+    listener = await asyncio.start_server(
+        server.handle, host, port, backlog=4096)
+    print(f"Tic-tac-toe server listening on {host}:{port}", flush=True)
+    if report_every:
+        asyncio.get_running_loop().create_task(server.report(report_every))
+    async with listener:
+        await listener.serve_forever()
+
+
+async def simulated_client(host, port, stop_at, think, stats, connecting):
+    # Plays random legal moves in back-to-back matches until stop_at
+    async with connecting:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.get_extra_info("socket").setsockopt(
+        socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    writer.write(pack(JOIN))
+    board = bytearray(BOARD_ROWS * BOARD_COLS)
+    buffer = bytearray()
+    me, turn = -1, 0  # -1 while waiting for MATCHED, 0 between matches
+    sent_at = None
+    try:
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            buffer += data
+            for kind, fields in split_messages(buffer):
+                if kind == MATCHED:
+                    me, turn = fields[0], 1
+                    board[:] = bytes(len(board))
+                elif kind == MOVED:
+                    number, row, col, result = fields
+                    board[row * BOARD_COLS + col] = number
+                    turn = 3 - number
+                    if number == me and sent_at is not None:
+                        stats["latencies"].append(time.perf_counter() - sent_at)
+                        sent_at = None
+                    if result:
+                        me = 0
+                        stats["games"] += 1
+                elif kind == OPPONENT_LEFT:
+                    me = 0
+                elif kind == ERROR:
+                    stats["errors"] += 1
+            if me == 0:
+                if time.perf_counter() >= stop_at:
+                    break
+                me = -1
+                writer.write(pack(JOIN))
+            elif me == turn and sent_at is None:
+                if think:
+                    await asyncio.sleep(random.uniform(0, 2 * think))
+                square = random.choice(
+                    [i for i, mark in enumerate(board) if not mark])
+                sent_at = time.perf_counter()
+                writer.write(pack(MOVE, *divmod(square, BOARD_COLS)))
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1,
+                             int(pct / 100 * len(sorted_values)))]
+
+
+async def loadtest(host, port, clients, duration, think):
+    stats = {"latencies": [], "games": 0, "errors": 0}
+    start = time.perf_counter()
+    stop_at = start + duration
+    connecting = asyncio.Semaphore(256)  # connection attempts at once
+
+    async def client():
+        try:
+            await simulated_client(host, port, stop_at, think, stats,
+                                   connecting)
+        except OSError as e:
+            stats["errors"] += 1
+            if stats["errors"] == 1:
+                print(f"Error connecting client: {e}")
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(stats["latencies"])
+    print(f"{clients} clients, {elapsed:.1f} s: {stats['games']} games, "
+          f"{len(latencies)} moves ({len(latencies) / elapsed:.0f} moves/s), "
+          f"{stats['errors']} errors")
+    print(f"move latency p50 {1000 * percentile(latencies, 50):.2f} ms, "
+          f"p99 {1000 * percentile(latencies, 99):.2f} ms, "
+          f"max {1000 * (latencies[-1] if latencies else 0):.2f} ms")
+
+
+def wait_for_port(host, port, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tic-tac-toe match server.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_args = sub.add_parser("serve", help="run the match server")
+    serve_args.add_argument("--host", default="0.0.0.0")
+    serve_args.add_argument("--port", type=int, default=PORT)
+    serve_args.add_argument("--report-every", type=float, default=5.0,
+                            help="seconds between status lines; 0 for none")
+    load_args = sub.add_parser("loadtest", help="play simulated clients")
+    load_args.add_argument("--host", default="127.0.0.1")
+    load_args.add_argument("--port", type=int, default=PORT)
+    load_args.add_argument("--clients", type=int, default=2000)
+    load_args.add_argument("--duration", type=float, default=10.0)
+    load_args.add_argument("--think-ms", type=float, default=0.0,
+                           help="mean delay before each move")
+    load_args.add_argument("--no-spawn", action="store_true",
+                           help="use an already running server")
+    args = parser.parse_args()
+
+    raise_file_limit()
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.report_every))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server = None
+    if not args.no_spawn:
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve",
+             "--host", args.host, "--port", str(args.port),
+             "--report-every", "0"])
+        if not wait_for_port(args.host, args.port):
+            server.terminate()
+            print("Error: the server did not start")
+            sys.exit(1)
+    try:
+        asyncio.run(loadtest(args.host, args.port, args.clients,
+                             args.duration, args.think_ms / 1000))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+
+import pygame
+
+import quality
+
+# Resolution-independent output. Scenes draw to a fixed logical surface
+# (the 700x500 every game and sprite is laid out for) and present() scales
+# it into a resizable window in one pass, letterboxed to keep the aspect
+# ratio. Filters:
+#   "smooth"  - smoothscale to the largest size that fits the window
+#   "integer" - nearest neighbour at the largest whole-number factor, for
+#               crisp pixels; windows smaller than the logical size fall
+#               back to smooth
+# Sprites stay at their logical size, so resizing the window reloads and
+# rescales nothing; the only per-size state is the viewport, cached by
+# window size. Below the quality levels with smooth scaling, "smooth" uses
+# nearest neighbour too.
+FILTERS = ("smooth", "integer")
+BAR_COLOR = (0, 0, 0)
+MOUSE_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+
+
+class ScaledDisplay:
+    def __init__(self, logical_size, window_size=None, filter="smooth"):
+        if filter not in FILTERS:
+            raise ValueError(f"Unknown scale filter: {filter}")
+        self.logical_size = tuple(logical_size)
+        self.filter = filter
+        self.window = pygame.display.set_mode(
+            window_size or self.logical_size, pygame.RESIZABLE)
+        self.surface = pygame.Surface(self.logical_size).convert()
+        self.viewports = {}  # window size -> (dest rect, scale function, bars)
+        self.resized()
+
+    @classmethod
+    def from_env(cls, logical_size):
+        # GAME_WINDOW=<width>x<height> sets the initial window size and
+        # GAME_SCALE=smooth|integer the filter
+        value = os.environ.get("GAME_WINDOW")
+        window_size = None
+        if value:
+            window_size = tuple(int(v) for v in value.lower().split("x"))
+        return cls(logical_size, window_size,
+                   os.environ.get("GAME_SCALE", "smooth"))
+
+    def get_size(self):
+        return self.logical_size
+
+    def fit(self, window_size):
+        (lw, lh), (ww, wh) = self.logical_size, window_size
+        if self.filter == "integer" and ww >= lw and wh >= lh:
+            factor = min(ww // lw, wh // lh)
+            w, h = lw * factor, lh * factor
+            scale = pygame.transform.scale
+        else:
+            factor = min(ww / lw, wh / lh)
+            w, h = max(1, round(lw * factor)), max(1, round(lh * factor))
+            scale = pygame.transform.smoothscale
+        if (w, h) == self.logical_size:
+            scale = None  # 1:1, a plain blit
+        rect = pygame.Rect((ww - w) // 2, (wh - h) // 2, w, h)
+        bars = [bar for bar in (
+            pygame.Rect(0, 0, ww, rect.top),
+            pygame.Rect(0, rect.bottom, ww, wh - rect.bottom),
+            pygame.Rect(0, rect.top, rect.left, h),
+            pygame.Rect(rect.right, rect.top, ww - rect.right, h),
+        ) if bar.width > 0 and bar.height > 0]
+        return rect, scale, bars
+
+    def resized(self):
+        self.window = pygame.display.get_surface()
+        size = self.window.get_size()
+        viewport = self.viewports.get(size)
+        if viewport is None:
+            viewport = self.viewports[size] = self.fit(size)
+        self.rect, self.scale, self.bars = viewport
+
+    def handle_event(self, event):
+        # Call on every event before the scenes see it
+        if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+            self.resized()
+        elif event.type in MOUSE_EVENTS:
+            event.pos = self.to_logical(event.pos)
+
+    def to_logical(self, pos):
+        # Window pixel to logical pixel; outside the viewport this falls
+        # outside the logical surface too
+        x, y = pos
+        lw, lh = self.logical_size
+        return ((x - self.rect.x) * lw // self.rect.width,
+                (y - self.rect.y) * lh // self.rect.height)
+
+    def mouse_pos(self):
+        return self.to_logical(pygame.mouse.get_pos())
+
+    def present(self):
+        for bar in self.bars:
+            self.window.fill(BAR_COLOR, bar)
+        scale = self.scale
+        if scale is None:
+            self.window.blit(self.surface, self.rect)
+            pygame.display.flip()
+            return
+        if scale is pygame.transform.smoothscale and not quality.current.smooth_scaling:
+            scale = pygame.transform.scale
+        scale(self.surface, self.rect.size, self.window.subsurface(self.rect))
+        pygame.display.flip()